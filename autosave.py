@@ -0,0 +1,210 @@
+import asyncio
+import difflib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Save once typing has paused this long, and at least this often while it hasn't
+IDLE_SECONDS = 2.0
+MAX_UNSAVED_SECONDS = 30.0
+# Revisions kept per post (oldest are dropped)
+MAX_REVISIONS = 50
+
+def atomic_write(path, text):
+    """Replaces path with text so readers see either the old or the new file, never a partial one.
+
+    Writes a temp file in the same directory, fsyncs it, renames it over
+    path and fsyncs the directory, so the rename itself survives a crash.
+    """
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')  # not *.md: never picked up as a post
+    try:
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try: os.fsync(fd)
+    finally: os.close(fd)
+
+def _sha(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+def make_delta(new, old):
+    """Returns a compact line delta turning `new` back into `old`."""
+    a, b = new.splitlines(keepends=True), old.splitlines(keepends=True)
+    delta = []
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op == 'equal':
+            delta.append(i2 - i1)  # keep lines
+        else:
+            if i2 > i1: delta.append(-(i2 - i1))  # drop lines
+            if j2 > j1: delta.append(b[j1:j2])  # insert lines
+    return delta
+
+def apply_delta(text, delta):
+    lines = text.splitlines(keepends=True)
+    out, pos = [], 0
+    for step in delta:
+        if isinstance(step, list): out += step
+        elif step > 0:
+            out += lines[pos:pos + step]
+            pos += step
+        else: pos -= step
+    return ''.join(out)
+
+class RevisionHistory:
+    """Bounded per-post history stored as reverse deltas (newest version -> previous).
+
+    Only the current file is kept in full, so each revision costs roughly
+    the size of the edit. Every entry records a hash of the text it applies
+    to, so a chain broken by a crash is cut off rather than misapplied.
+    """
+
+    def __init__(self, history_dir, max_revisions=MAX_REVISIONS):
+        self.history_dir = history_dir
+        self.max_revisions = max_revisions
+
+    def record(self, name, new, old):
+        """Stores `old` as a revision of `name`, now that `new` replaced it on disk."""
+        entries = self._load(name)
+        entries.append({"time": time.time(), "sha": _sha(new), "delta": make_delta(new, old)})
+        os.makedirs(self.history_dir, exist_ok=True)
+        atomic_write(self._path(name), ''.join(json.dumps(e) + '\n' for e in entries[-self.max_revisions:]))
+
+    def revisions(self, name, current):
+        """Returns [(time, text)] for `name`, newest first, rebuilt from its current text."""
+        result = []
+        text = current
+        for entry in reversed(self._load(name)):
+            if entry['sha'] != _sha(text): break
+            text = apply_delta(text, entry['delta'])
+            result.append((entry['time'], text))
+        return result
+
+    def _load(self, name):
+        try:
+            with open(self._path(name), encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+    def _path(self, name):
+        return os.path.join(self.history_dir, name + '.jsonl')
+
+class AutoSaver:
+    """Write-behind saving of posts, off the event loop.
+
+    edit() only records the latest text, so it is safe to call on every
+    keystroke. run() writes a post once typing pauses for IDLE_SECONDS, or
+    after MAX_UNSAVED_SECONDS at the latest. Rapid edits coalesce into one
+    write, and writes to a post never overlap. Each write is atomic and
+    adds a revision to the history.
+    """
+
+    def __init__(self, posts_dir, history=None, idle=IDLE_SECONDS, max_unsaved=MAX_UNSAVED_SECONDS):
+        self.posts_dir = posts_dir
+        self.history = history or RevisionHistory(os.path.join(posts_dir, '.history'))
+        self.idle = idle
+        self.max_unsaved = max_unsaved
+        self._pending = {}  # name -> [text, first edit, last edit]
+        self._saved = {}  # name -> sha of the text on disk
+        self._locks = {}  # name -> asyncio.Lock
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # the shutdown flush may overlap a write still on its thread
+        # Callables invoked with (name, OSError) when a background save fails
+        self.failure_listeners = []
+
+    def loaded(self, name, text):
+        """Tells the saver what is on disk, e.g. after opening a post."""
+        with self._lock:
+            self._saved[name] = _sha(text)
+            self._pending.pop(name, None)
+
+    def edit(self, name, text):
+        """Records the latest text of a post; it is written later."""
+        now = time.monotonic()
+        with self._lock:
+            if self._saved.get(name) == _sha(text):
+                self._pending.pop(name, None)
+                return
+            pending = self._pending.get(name)
+            if pending: pending[0], pending[2] = text, now
+            else: self._pending[name] = [text, now, now]
+
+    def dirty(self, name):
+        """Returns True while a post has edits not yet on disk."""
+        return name in self._pending
+
+    async def save(self, name, text=None):
+        """Writes a post now (its pending edits, or `text`), waiting for the write to finish.
+
+        If the write fails the text stays pending, and the OSError is raised.
+        """
+        with self._lock:
+            pending = self._pending.pop(name, None)
+        if text is None:
+            if pending is None: return
+            text = pending[0]
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if self._saved.get(name) == _sha(text): return
+            try:
+                await asyncio.to_thread(self._write, name, text)
+            except OSError:
+                # Kept for another attempt after the idle delay, unless a newer edit came in meanwhile
+                now = time.monotonic()
+                with self._lock: self._pending.setdefault(name, [text, now, now])
+                raise
+            self._saved[name] = _sha(text)
+
+    async def run(self, tick=0.5):
+        """Saves due posts until cancelled, then flushes everything still pending."""
+        try:
+            while True:
+                await asyncio.sleep(tick)
+                now = time.monotonic()
+                with self._lock:
+                    due = [name for name, (_, first, last) in self._pending.items()
+                           if now - last >= self.idle or now - first >= self.max_unsaved]
+                for name in due:
+                    try: await self.save(name)
+                    except OSError as e:
+                        log.exception('Autosave of %s failed', name)
+                        for listener in self.failure_listeners: listener(name, e)
+        finally:
+            self.flush()
+
+    def flush(self):
+        """Writes every pending post synchronously (e.g. at shutdown)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for name, (text, _, _) in pending.items():
+            try: self._write(name, text)
+            except OSError: log.exception('Saving %s failed', name)
+
+    def _write(self, name, text):
+        with self._write_lock: self._write_post(name, text)
+
+    def _write_post(self, name, text):
+        path = os.path.join(self.posts_dir, name)
+        try:
+            with open(path, encoding='utf-8', newline='') as f: old = f.read()
+        except FileNotFoundError:
+            old = None
+        if old == text: return
+        atomic_write(path, text)
+        # After the post: a crash in between loses one revision, never the post
+        if old is not None: self.history.record(name, text, old)
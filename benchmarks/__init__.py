@@ -0,0 +1,9 @@
+"""Benchmarks for the blog server.
+
+    python -m benchmarks.corpus /tmp/corpus --posts 5000
+    python -m benchmarks.micro --posts 1000 --json micro.json
+    python -m benchmarks.load --posts 1000 --concurrency 50 --sessions 200 --json load.json
+
+Every command prints (or writes) machine-readable JSON tagged with the
+current git commit, so runs can be diffed between commits.
+"""
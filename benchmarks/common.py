@@ -0,0 +1,52 @@
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+def latency_stats(samples):
+    """Returns count, mean and p50/p95/p99/max (in milliseconds) of latencies given in seconds."""
+    if not samples: return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": round(percentile(50), 4),
+        "p95_ms": round(percentile(95), 4),
+        "p99_ms": round(percentile(99), 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+def environment():
+    """Returns what a result needs to be compared across runs: commit, Python and host."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+def emit(result, path=None):
+    """Writes the result as JSON to path, or to stdout."""
+    text = json.dumps(result, indent=2, default=str)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f: f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+def rss_bytes(pid):
+    """Returns the resident set size of a process (Linux /proc), or None where unavailable."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'): return int(line.split()[1]) * 1024
+    except OSError:
+        return None
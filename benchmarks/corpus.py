@@ -0,0 +1,97 @@
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+WORDS = (
+    "server docker compose proxy nginx backup raid disk network vlan router firewall dns adguard "
+    "container volume kernel ubuntu debian laptop phone battery storage photo family week weekend "
+    "project note idea plan setup install config update upgrade monitor dashboard metric alert "
+    "the a and of to in is it that was for on with as my this but not be at by have from or"
+).split()
+TAGS = ['homelab', 'docker', 'networking', 'linux', 'life', 'hardware', 'self-hosting', 'security']
+DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%b %d, %Y', '%B %d, %Y']
+LANGUAGES = ['bash', 'python', 'yaml', '']
+IMAGE_COUNT = 8
+
+def sentence(rng, low=6, high=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+    for i in rng.sample(range(len(words)), k=min(2, len(words))):
+        style = rng.random()
+        if style < 0.15: words[i] = f'**{words[i]}**'
+        elif style < 0.3: words[i] = f'*{words[i]}*'
+        elif style < 0.4: words[i] = f'`{words[i]}_{rng.choice(WORDS)}`'
+        elif style < 0.5: words[i] = f'[{words[i]}](https://example.com/{words[i]})'
+    return ' '.join(words).capitalize() + '.'
+
+def paragraph(rng):
+    return ' '.join(sentence(rng) for _ in range(rng.randint(2, 6)))
+
+def code_block(rng):
+    lines = [f'{rng.choice(WORDS)}_{rng.choice(WORDS)} = "{rng.choice(WORDS)}"' for _ in range(rng.randint(3, 15))]
+    return f"```{rng.choice(LANGUAGES)}\n" + '\n'.join(lines) + "\n```"
+
+def post_body(rng, images):
+    blocks = []
+    for _ in range(rng.randint(4, 30)):
+        kind = rng.random()
+        if kind < 0.12: blocks.append('#' * rng.randint(2, 3) + ' ' + sentence(rng, 2, 6).rstrip('.'))
+        elif kind < 0.22: blocks.append(code_block(rng))
+        elif kind < 0.28: blocks.append('> ' + sentence(rng))
+        elif kind < 0.34: blocks.append('\n'.join(f'- {sentence(rng, 3, 8)}' for _ in range(rng.randint(2, 6))))
+        elif kind < 0.40 and images: blocks.append(f'![{sentence(rng, 2, 5).rstrip(".")}](images/{rng.choice(images)})')
+        else: blocks.append(paragraph(rng))
+    return '\n\n'.join(blocks) + '\n'
+
+def post_text(rng, index, images):
+    published = date(2015, 1, 1) + timedelta(days=rng.randint(0, 4000))
+    tags = ', '.join(rng.sample(TAGS, k=rng.randint(0, 3)))
+    return (
+        '---\n'
+        f'title: "{sentence(rng, 3, 9).rstrip(".")} #{index}"\n'
+        f'date: {published.strftime(rng.choice(DATE_FORMATS))}\n'
+        'author: Benchmark\n'
+        f'tags: [{tags}]\n'
+        '---\n\n'
+        + post_body(rng, images)
+    )
+
+def write_images(images_dir, rng):
+    """Writes a few photo-sized JPEGs for posts to reference (needs Pillow)."""
+    if Image is None: return []
+    os.makedirs(images_dir, exist_ok=True)
+    names = []
+    for i in range(IMAGE_COUNT):
+        name = f'bench-{i}.jpg'
+        path = os.path.join(images_dir, name)
+        if not os.path.exists(path):
+            size = (rng.randint(800, 2400), rng.randint(600, 1600))
+            Image.effect_noise(size, rng.randint(20, 80)).convert('RGB').save(path, quality=85)
+        names.append(name)
+    return names
+
+def generate(out_dir, posts, seed=0):
+    """Writes `posts` synthetic markdown posts (plus images/) into out_dir; returns the post filenames."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    images = write_images(os.path.join(out_dir, 'images'), rng)
+    names = []
+    for i in range(posts):
+        name = f'post-{i:05d}.md'
+        with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as f:
+            f.write(post_text(rng, i, images))
+        names.append(name)
+    return names
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic posts/ directory.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--posts', type=int, default=1000, help='number of posts (100 to 50000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(f'Wrote {len(generate(args.out_dir, args.posts, args.seed))} posts to {args.out_dir}')
@@ -0,0 +1,160 @@
+import argparse
+import ast
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from urllib.parse import urlencode
+
+import httpx
+
+from benchmarks.common import emit, environment, latency_stats, rss_bytes
+from benchmarks.corpus import generate
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# NiceGUI embeds the socket.io handshake parameters in every interactive page
+QUERY = re.compile(r'query: (\{.*?\}),\n')
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(posts_dir, port, read_only):
+    env = dict(os.environ, BLOG_POSTS_DIR=posts_dir, BLOG_PORT=str(port), BLOG_RELOAD='0')
+    args = [sys.executable, 'main.py'] + (['--read-only'] if read_only else [])
+    return subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def wait_ready(base, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None: raise RuntimeError(f'main.py exited with {server.returncode}')
+            try:
+                if (await client.get('/')).status_code == 200: return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f'main.py did not answer within {timeout}s')
+
+async def drive(base, paths, concurrency, duration):
+    """Requests random paths from `concurrency` clients for `duration` seconds."""
+    latencies = {}
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async def worker(client, rng):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            route, path = rng.choice(paths)
+            start = time.perf_counter()
+            try:
+                ok = (await client.get(path)).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok: latencies.setdefault(route, []).append(time.perf_counter() - start)
+            else: errors += 1
+
+    started = time.monotonic()
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, random.Random(i)) for i in range(concurrency)))
+    elapsed = time.monotonic() - started
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "routes": {route: latency_stats(samples) for route, samples in sorted(latencies.items())},
+    }
+
+async def open_session(base, path):
+    """Loads a page and connects its websocket the way the browser would; returns the socket.io client."""
+    async with httpx.AsyncClient(base_url=base) as client:
+        match = QUERY.search((await client.get(path)).text)
+    if not match: return None  # not a NiceGUI page, e.g. in --read-only mode
+    query = ast.literal_eval(match.group(1))  # rendered as a Python dict literal
+    query.update(document_id=str(uuid.uuid4()), tab_id=str(uuid.uuid4()))
+    query = {k: json.dumps(v) if isinstance(v, bool) else v for k, v in query.items()}
+    sio = socketio.AsyncClient(reconnection=False)
+    await sio.connect(f'{base}?{urlencode(query)}', socketio_path='_nicegui_ws/socket.io', transports=['websocket'])
+    return sio
+
+async def run_load(args, posts_dir):
+    names = sorted(f for f in os.listdir(posts_dir) if f.endswith('.md'))
+    rng = random.Random(0)
+    paths = [('/', '/'), ('/blog', '/blog')] * 5
+    paths += [('/post/{filename}', f'/post/{name}') for name in rng.sample(names, min(len(names), 50))]
+
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    server = start_server(posts_dir, port, args.read_only)
+    sessions = []
+    try:
+        await wait_ready(base, server)
+        # One pass over every path first, so parsing and image variants are not billed to the run
+        async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+            for _, path in set(paths): await client.get(path)
+        idle_rss = rss_bytes(server.pid)
+        result = {
+            "benchmark": "load",
+            "environment": environment(),
+            "config": {"posts": len(names), "concurrency": args.concurrency, "duration": args.duration,
+                       "sessions": args.sessions, "read_only": args.read_only},
+            "rss_idle_bytes": idle_rss,
+        }
+        if args.sessions and socketio is None:
+            result["sessions_skipped"] = 'python-socketio is not installed'
+        elif args.sessions:
+            started = time.perf_counter()
+            opened = await asyncio.gather(*(open_session(base, '/blog') for _ in range(args.sessions)))
+            sessions = [sio for sio in opened if sio is not None]
+            if not sessions: result["sessions_skipped"] = 'pages are static in --read-only mode'
+            await asyncio.sleep(1)  # let the server settle its per-client state
+            rss = rss_bytes(server.pid)
+            result["sessions"] = {
+                "connected": len(sessions),
+                "connect_seconds": round(time.perf_counter() - started, 3),
+                "rss_bytes": rss,
+                "rss_per_client_bytes": (rss - idle_rss) // len(sessions) if sessions and rss and idle_rss else None,
+            }
+        result["http"] = await drive(base, paths, args.concurrency, args.duration)
+        result["rss_final_bytes"] = rss_bytes(server.pid)
+        return result
+    finally:
+        for sio in sessions:
+            try: await sio.disconnect()
+            except Exception: pass
+        server.terminate()
+        try: server.wait(10)
+        except subprocess.TimeoutExpired: server.kill()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test a locally started main.py.')
+    parser.add_argument('--posts', type=int, default=1000, help='size of the generated corpus')
+    parser.add_argument('--posts-dir', help='serve an existing posts directory instead')
+    parser.add_argument('--concurrency', type=int, default=20, help='concurrent HTTP clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of HTTP load')
+    parser.add_argument('--sessions', type=int, default=50, help='websocket sessions held open during the run')
+    parser.add_argument('--read-only', action='store_true', help='benchmark the static read-only mode')
+    parser.add_argument('--json', metavar='PATH', help='write results here instead of stdout')
+    args = parser.parse_args()
+    if args.posts_dir:
+        emit(asyncio.run(run_load(args, args.posts_dir)), args.json)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            generate(tmp, args.posts)
+            emit(asyncio.run(run_load(args, tmp)), args.json)
@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import emit, environment, latency_stats
+from benchmarks.corpus import generate, post_body
+from live_preview import diff_blocks, split_blocks
+from post_index import PostIndex, parse_date, strip_markdown, summarize
+
+DATES = ['2024-03-09', '09-03-2024', 'Mar 09, 2024', 'March 09, 2024', 'not a date']
+
+def timed(fn, *args, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_get_posts(posts_dir, repeat):
+    """Cold = first scan of a fresh index; warm = rescan with every file unchanged;
+    manifest = a new process restoring the index from its manifest."""
+    cold = []
+    for _ in range(max(1, repeat // 10)):
+        cold += timed(PostIndex(posts_dir).refresh, False)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = PostIndex(posts_dir, os.path.join(tmp, 'manifest.json'))
+        index.refresh(False)
+        warm = timed(index.refresh, False, repeat=repeat)
+        index.save_manifest()
+        manifest = timed(lambda: PostIndex(posts_dir, index.manifest_path).load_manifest(), repeat=max(1, repeat // 10))
+    return {"cold": latency_stats(cold), "warm": latency_stats(warm), "manifest": latency_stats(manifest),
+            "posts": len(index.posts())}
+
+def bench_summaries(posts_dir, names):
+    bodies = []
+    for name in names:
+        with open(os.path.join(posts_dir, name), encoding='utf-8') as f:
+            bodies.append(f.read().split('---', 2)[2])
+    size = sum(len(body) for body in bodies)
+    result = {"bodies": len(bodies), "bytes": size}
+    for label, fn in (('strip_markdown', strip_markdown), ('summarize', summarize)):
+        samples = [timed(fn, body)[0] for body in bodies]
+        result[label] = latency_stats(samples)
+        result[label]["mb_per_s"] = round(size / sum(samples) / 1e6, 2)
+    return result
+
+def bench_parse_date(repeat):
+    return {value: latency_stats(timed(parse_date, value, repeat=repeat)) for value in DATES}
+
+def bench_preview(repeat, sizes=(25_000, 100_000, 400_000)):
+    """Cost of the editor preview's block split and diff after an edit (paid per debounced render)."""
+    rng = random.Random(0)
+    result = {}
+    for size in sizes:
+        doc = ''
+        while len(doc) < size: doc += post_body(rng, []) + '\n'
+        blocks = split_blocks(doc)
+        samples = []
+        for _ in range(repeat * 10):
+            pos = rng.randrange(len(doc))
+            doc = doc[:pos] + 'x' + doc[pos:]
+            start = time.perf_counter()
+            new = split_blocks(doc)
+            diff_blocks(blocks, new)
+            samples.append(time.perf_counter() - start)
+            blocks = new
+        result[f'{size // 1000}kb'] = latency_stats(samples)
+    return result
+
+def run(posts, repeat, posts_dir=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        posts_dir = posts_dir or tmp
+        if posts_dir == tmp:
+            names = generate(posts_dir, posts)
+        else:
+            names = sorted(f for f in os.listdir(posts_dir) if f.endswith('.md'))
+        return {
+            "benchmark": "micro",
+            "environment": environment(),
+            "get_posts": bench_get_posts(posts_dir, repeat),
+            "summaries": bench_summaries(posts_dir, names),
+            "parse_date": bench_parse_date(repeat * 100),
+            "preview": bench_preview(repeat),
+        }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for post indexing and parsing.')
+    parser.add_argument('--posts', type=int, default=1000, help='size of the generated corpus')
+    parser.add_argument('--posts-dir', help='benchmark an existing posts directory instead')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', metavar='PATH', help='write results here instead of stdout')
+    args = parser.parse_args()
+    emit(run(args.posts, args.repeat, args.posts_dir), args.json)
@@ -1,7 +1,13 @@
-from nicegui import ui, app
+from nicegui import ui, app, background_tasks
+import asyncio
 import os
 import frontmatter
 from datetime import datetime
+from autosave import AutoSaver, atomic_write
+from file_explorer import FileExplorer
+from live_preview import LivePreview
+from post_index import PostIndex
+from post_watcher import watch_posts
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -11,42 +17,98 @@ POSTS_DIR = os.path.join(BASE_DIR, 'posts')
 if not os.path.exists(POSTS_DIR):
     os.makedirs(POSTS_DIR)
 
+# Posts are written behind the editor: after a pause in typing, off the event loop
+autosaver = AutoSaver(POSTS_DIR)
+app.on_startup(lambda: background_tasks.create(autosaver.run(), name='autosave'))
+
+# Cached listing for the explorer, kept current from filesystem events
+post_index = PostIndex(POSTS_DIR, os.path.join(POSTS_DIR, '.manifest.json'))
+post_index.load_manifest()
+app.on_shutdown(post_index.save_manifest)
+app.on_startup(lambda: background_tasks.create(watch_posts(post_index), name='watch_posts'))
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def load_revisions(name):
+    try: current = read_text(os.path.join(POSTS_DIR, name))
+    except FileNotFoundError: return []
+    return autosaver.history.revisions(name, current)
+
 class BlogEditor:
     def __init__(self):
         self.current_file = None
         self.editor = None
         self.preview = None
-        self.file_list = None
+        self.explorer = None
         
         # UI State
         self.content = ""
 
-    def load_file(self, filename):
+    async def load_file(self, filename):
         """Loads a file into the editor"""
+        # Edits not yet autosaved (e.g. the post was reopened within the idle delay) go to disk first
+        if autosaver.dirty(filename):
+            try: await autosaver.save(filename)
+            except OSError as e:
+                ui.notify(f'Saving {filename} failed: {e}', color='negative')
+                return
         filepath = os.path.join(POSTS_DIR, filename)
         if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                self.content = f.read()
+            self.content = await asyncio.to_thread(read_text, filepath)
             self.current_file = filename
+            autosaver.loaded(filename, self.content)
             if self.editor:
                 self.editor.value = self.content
             if self.preview:
-                self.preview.content = self.content
+                self.preview.set_content(self.content)
             ui.notify(f'Loaded {filename}')
             self.refresh_title()
-            self.refresh_file_list()
+            if self.explorer:
+                self.explorer.set_active(filename)
 
-    def save_file(self):
-        """Saves current content to file"""
+    async def save_file(self):
+        """Saves current content to file now (autosave does this after a pause anyway)"""
         if not self.current_file:
             ui.notify('No file selected!', color='warning')
             return
             
-        filepath = os.path.join(POSTS_DIR, self.current_file)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(self.editor.value)
+        try:
+            await autosaver.save(self.current_file, self.editor.value)
+        except OSError as e:
+            ui.notify(f'Saving failed: {e}', color='negative')
+            return
         ui.notify('Saved successfully!', color='positive')
 
+    async def show_history(self):
+        """Lists earlier revisions of the current post; picking one loads it into the editor"""
+        if not self.current_file:
+            ui.notify('No file selected!', color='warning')
+            return
+        name = self.current_file
+        # The history chains back from what is on disk, so pending edits are written first
+        try: await autosaver.save(name)
+        except OSError as e: ui.notify(f'Saving failed: {e}', color='negative')
+        revisions = await asyncio.to_thread(load_revisions, name)
+        if name != self.current_file: return
+        if not revisions:
+            ui.notify('No earlier revisions')
+            return
+
+        def restore(text):
+            self.editor.value = text
+            dialog.close()
+
+        with ui.dialog() as dialog, ui.card():
+            ui.label(f'History of {name}')
+            with ui.column().classes('gap-1 max-h-96 overflow-y-auto'):
+                for saved, text in revisions:
+                    ui.button(datetime.fromtimestamp(saved).strftime('%Y-%m-%d %H:%M:%S'),
+                              on_click=lambda t=text: restore(t)).props('flat align=left')
+            ui.button('Cancel', on_click=dialog.close, color='warning')
+        dialog.open()
+
     def create_new_post(self):
         """Creates a new post template"""
         # Dialog to get filename
@@ -54,7 +116,7 @@ class BlogEditor:
             ui.label('Create New Post')
             filename_input = ui.input('Filename (e.g., my-post.md)')
             
-            def create():
+            async def create():
                 name = filename_input.value
                 if not name:
                     return
@@ -77,11 +139,11 @@ Start writing here...
                     ui.notify('File already exists!', color='negative')
                     return
                 
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(template)
+                await asyncio.to_thread(atomic_write, filepath, template)
                 
-                self.refresh_file_list()
-                self.load_file(name)
+                # Listed right away rather than when the watcher catches up
+                post_index.notify(await asyncio.to_thread(post_index.update, [name], False))
+                await self.load_file(name)
                 dialog.close()
 
             ui.button('Create', on_click=create)
@@ -89,17 +151,14 @@ Start writing here...
 
         dialog.open()
 
-    def refresh_file_list(self):
-        """Refreshes the file list in the sidebar"""
-        self.file_list.clear()
-        files = [f for f in os.listdir(POSTS_DIR) if f.endswith('.md')]
-        with self.file_list:
-            for file in files:
-                active = file == self.current_file
-                ui.button(file, on_click=lambda f=file: self.load_file(f)) \
-                    .props(f'flat align=left {"color=primary" if active else ""}') \
-                    .classes('w-full text-left rounded-md tracking-tight') \
-                    .classes('bg-gray-100 dark:bg-zinc-800' if active else 'hover:bg-gray-100 dark:hover:bg-zinc-800 text-gray-700 dark:text-gray-400')
+    async def refresh_file_list(self):
+        """Rescans the posts directory (the watcher normally keeps the list current)"""
+        post_index.notify(await asyncio.to_thread(post_index.refresh, False))
+
+    def autosave_failed(self, name, error):
+        """AutoSaver listener: background saves only reach the log otherwise"""
+        if name == self.current_file:
+            with self.editor: ui.notify(f'Autosave failed: {error}', color='negative')
 
     def refresh_title(self):
         title = "MarkText Clone"
@@ -108,9 +167,11 @@ Start writing here...
         ui.page_title(title)
 
     def handle_input(self, e):
-        """Updates preview on input"""
+        """Updates preview on input (debounced; only changed blocks are re-rendered)"""
         self.content = e.value
-        self.preview.content = self.content # Direct binding might be slow for large docs, but OK for now
+        self.preview.schedule(self.content)
+        if self.current_file:
+            autosaver.edit(self.current_file, self.content)
 
     def set_view_mode(self, mode):
         self.view_mode = mode
@@ -124,7 +185,7 @@ Start writing here...
             self.editor_col.classes(remove='hidden w-full', add='w-1/2')
             self.preview_col.classes(remove='hidden w-full', add='w-1/2')
 
-    def setup_ui(self):
+    async def setup_ui(self):
         # Header
         with ui.header().classes('items-center justify-between border-b h-14') \
                 .classes('bg-white text-slate-800 border-slate-200') \
@@ -139,6 +200,7 @@ Start writing here...
                 ui.separator().props('vertical spaced')
                 ui.button(on_click=self.create_new_post, icon='add').props('flat round dense').tooltip('New Post')
                 ui.button(on_click=self.save_file, icon='save').props('flat round dense').tooltip('Save')
+                ui.button(on_click=self.show_history, icon='history').props('flat round dense').tooltip('History')
                 ui.switch(on_change=lambda e: ui.dark_mode(e.value)).props('color=grey-8 unchecked-icon=light_mode checked-icon=dark_mode transform').tooltip('Toggle Dark Mode')
 
         # Drawer (Sidebar)
@@ -151,8 +213,10 @@ Start writing here...
                     .classes('text-gray-400 dark:text-gray-500')
                 ui.button(icon='refresh', on_click=self.refresh_file_list).props('flat round size=xs color=grey')
             
-            self.file_list = ui.column().classes('w-full p-2 gap-1')
-            self.refresh_file_list()
+            self.explorer = FileExplorer(post_index, self.load_file).classes('grow')
+
+        autosaver.failure_listeners.append(self.autosave_failed)
+        ui.context.client.on_delete(lambda: autosaver.failure_listeners.remove(self.autosave_failed))
 
         # Main Content
         with ui.row().classes('w-full h-[calc(100vh-56px)] no-wrap gap-0') \
@@ -161,27 +225,28 @@ Start writing here...
             self.editor_col = ui.column().classes('w-1/2 h-full border-r p-0') \
                 .classes('border-gray-200 dark:border-zinc-800')
             with self.editor_col:
-                self.editor = ui.codemirror(language='markdown', theme='dracula') \
-                    .classes('w-full h-full text-base') \
-                    .on('change', self.handle_input)
+                self.editor = ui.codemirror(language='markdown', theme='dracula', on_change=self.handle_input) \
+                    .classes('w-full h-full text-base')
             
             # Preview Pane (Right)
-            self.preview_col = ui.column().classes('w-1/2 h-full p-8 overflow-y-auto') \
+            self.preview_col = ui.column().classes('relative w-1/2 h-full p-8 overflow-y-auto') \
                 .classes('bg-white dark:bg-zinc-950 text-slate-900 dark:text-slate-300')
             with self.preview_col:
-                self.preview = ui.markdown(self.content).classes('w-full prose max-w-none') \
+                self.preview = LivePreview()
+                self.preview.container.classes('w-full nicegui-markdown prose max-w-none') \
                     .classes('dark:prose-invert')
+            self.preview.sync_scroll(self.editor, self.preview_col)
 
         # Load first file if exists
-        files = [f for f in os.listdir(POSTS_DIR) if f.endswith('.md')]
+        files = sorted(post_index.titles())
         if files:
-            self.load_file(files[0])
+            await self.load_file(files[0])
         self.set_view_mode('Split')
 
 
 @ui.page('/')
-def main():
+async def main():
     app = BlogEditor()
-    app.setup_ui()
+    await app.setup_ui()
 
 ui.run(title="MarkText Clone", port=8080, reload=True)
@@ -0,0 +1,91 @@
+// Post list for the editor sidebar. Only the visible rows exist in the DOM
+// (q-virtual-scroll), filtering runs in the browser, and the server sends
+// listing patches and the active file instead of re-rendering the list.
+export default {
+  template: `
+    <div class="flex flex-col w-full min-h-0">
+      <q-input v-model="query" dense clearable borderless placeholder="Filter posts" class="px-3"
+               @keydown.enter="shown.length && select(shown[0].name)">
+        <template v-slot:prepend><q-icon name="search" size="xs" /></template>
+      </q-input>
+      <div v-if="!shown.length" class="px-4 py-2 text-sm italic text-gray-400">No posts match</div>
+      <q-virtual-scroll :items="shown" :virtual-scroll-item-size="44" class="grow min-h-0 w-full px-2"
+                        v-slot="{ item }">
+        <div :key="item.name" @click="select(item.name)" :title="item.title || item.name"
+             class="w-full px-3 py-1 rounded-md tracking-tight cursor-pointer"
+             :class="item.name === current
+               ? 'bg-gray-100 dark:bg-zinc-800 text-primary'
+               : 'hover:bg-gray-100 dark:hover:bg-zinc-800 text-gray-700 dark:text-gray-400'">
+          <div class="truncate text-sm font-medium">{{ item.name }}</div>
+          <div class="truncate text-xs opacity-60">{{ item.title || ' ' }}</div>
+        </div>
+      </q-virtual-scroll>
+    </div>
+  `,
+  props: {
+    files: Array, // [[filename, title], ...] sorted by filename
+    active: String,
+  },
+  data() {
+    return { query: "", current: this.active, items: this.build(this.files || []) };
+  },
+  computed: {
+    shown() {
+      const terms = (this.query || "").toLowerCase().split(/\s+/).filter(Boolean);
+      if (!terms.length) return this.items;
+      const scored = [];
+      for (const item of this.items) {
+        let total = 0;
+        for (const term of terms) {
+          const score = Math.max(fuzzyScore(term, item.key), fuzzyScore(term, item.titleKey));
+          if (score < 0) { total = -1; break; }
+          total += score;
+        }
+        if (total >= 0) scored.push([total, item]);
+      }
+      scored.sort((a, b) => b[0] - a[0] || (a[1].name < b[1].name ? -1 : 1));
+      return scored.map((entry) => entry[1]);
+    },
+  },
+  watch: {
+    files(files) {
+      this.items = this.build(files || []);
+    },
+    active(name) {
+      this.current = name;
+    },
+  },
+  methods: {
+    build(files) {
+      return files.map(([name, title]) => ({ name, title, key: name.toLowerCase(), titleKey: (title || "").toLowerCase() }));
+    },
+    select(name) {
+      this.current = name;
+      this.$emit("select", name);
+    },
+    setActive(name) {
+      this.current = name;
+    },
+    patch(upserts, removed) {
+      // upserts: [[filename, title], ...]; removed: [filename, ...]
+      const byName = new Map(this.items.map((item) => [item.name, item]));
+      for (const name of removed) byName.delete(name);
+      for (const item of this.build(upserts)) byName.set(item.name, item);
+      this.items = [...byName.values()].sort((a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
+    },
+  },
+};
+
+// Subsequence match of query in text: -1 if it does not match, otherwise
+// higher for consecutive characters, word starts and shorter texts.
+function fuzzyScore(query, text) {
+  let score = 0, last = -2, at = 0;
+  for (const c of query) {
+    at = text.indexOf(c, at);
+    if (at < 0) return -1;
+    score += at === last + 1 ? 3 : 1;
+    if (at === 0 || " -_./".includes(text[at - 1])) score += 2;
+    last = at++;
+  }
+  return score - text.length / 100;
+}
@@ -0,0 +1,48 @@
+from nicegui import ui
+
+class FileExplorer(ui.element, component='file_explorer.js'):
+    """Virtualized, filterable list of the posts in a PostIndex.
+
+    The listing is sent once; afterwards only the files the index reports as
+    changed are patched in, so nothing is re-listed or re-rendered on load or
+    refresh. Filtering (fuzzy, by filename and title) happens in the browser,
+    and selecting a post only moves the highlight.
+    """
+
+    def __init__(self, index, on_select):
+        super().__init__()
+        self.index = index
+        self._files = index.titles()  # filename -> title, as last sent
+        self._props['files'] = sorted(self._files.items())
+        self._props['active'] = None
+        self.on_select = on_select
+        self.on('select', self._select)
+        index.listeners.append(self.changed)
+        self.client.on_delete(lambda: index.listeners.remove(self.changed))
+
+    def set_active(self, filename):
+        """Highlights a post without re-sending the listing."""
+        if self._props['active'] == filename: return
+        # Kept in the props (for reconnects) but not pushed with update(), which would resend every file
+        self._props['active'] = filename
+        if self.client.has_socket_connection: self.run_method('setActive', filename)
+        else: self.update()
+
+    def _select(self, e):
+        if e.args in self._files: return self.on_select(e.args)  # only listed posts, never arbitrary paths
+
+    def changed(self, filenames):
+        """PostIndex listener: patches the changed files into the client's listing."""
+        titles = self.index.titles()
+        upserts, removed = [], []
+        for name in filenames:
+            title = titles.get(name)
+            if title is None:
+                if self._files.pop(name, None) is not None: removed.append(name)
+            elif self._files.get(name) != title:
+                self._files[name] = title
+                upserts.append((name, title))
+        if not upserts and not removed: return
+        self._props['files'] = sorted(self._files.items())
+        if self.client.has_socket_connection: self.run_method('patch', upserts, removed)
+        else: self.update()
@@ -0,0 +1,94 @@
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from datetime import datetime, timezone
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+# Sent for URLs whose content can never change (the fingerprint changes instead)
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+class CachePolicy:
+    """Maps route prefixes to Cache-Control values; the longest matching prefix wins.
+
+    Static URLs carrying a content fingerprint (a `v=` query parameter) are
+    always served as immutable.
+    """
+
+    def __init__(self, policies, default='no-cache'):
+        self.policies = sorted(policies.items(), key=lambda item: len(item[0]), reverse=True)
+        self.default = default
+
+    def for_path(self, path):
+        for prefix, value in self.policies:
+            if path.startswith(prefix): return value
+        return self.default
+
+    def install(self, app, *static_routes):
+        """Adds middleware setting Cache-Control on static mounts (images, fonts)."""
+        @app.middleware('http')
+        async def static_cache_control(request: Request, call_next):
+            response = await call_next(request)
+            if request.url.path.startswith(static_routes):
+                fingerprinted = 'v' in request.query_params
+                response.headers['Cache-Control'] = IMMUTABLE if fingerprinted else self.for_path(request.url.path)
+            return response
+
+def strong_etag(*parts):
+    """Builds a quoted strong ETag from content hashes (or any strings)."""
+    return '"' + hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()[:32] + '"'
+
+def cached_html(request, render, etag, mtime_ns, cache_control):
+    """Returns 304 if the client's validators still match, else the HTML from render().
+
+    render is only called when a full response is needed. Pass mtime_ns=None
+    where no modification time only ever moves forward (e.g. listings, whose
+    newest post can be deleted); the ETag alone then validates.
+    """
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    last_modified = None
+    if mtime_ns is not None:
+        last_modified = datetime.fromtimestamp(mtime_ns // 1_000_000_000, tz=timezone.utc)
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(render(), headers=headers)
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try: return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError): return False
+    return False
+
+class PublicResponseCookies:
+    """ASGI middleware removing Set-Cookie from responses marked `public`.
+
+    NiceGUI's session middleware sets the session cookie on every response.
+    A shared cache would either refuse such a response or hand one
+    visitor's cookie to everybody. Add it outside the session middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async def send_without_cookies(message):
+            if message['type'] == 'http.response.start':
+                headers = message.get('headers', [])
+                cache_control = b','.join(value for name, value in headers if name.lower() == b'cache-control')
+                if b'public' in cache_control.lower():
+                    message = {**message, 'headers': [(name, value) for name, value in headers
+                                                      if name.lower() != b'set-cookie']}
+            await send(message)
+
+        await self.app(scope, receive, send_without_cookies)
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+log = logging.getLogger(__name__)
+
+WIDTHS = (480, 960, 1600)
+SIZES = '(max-width: 768px) 100vw, 768px'
+QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80, 'png': None}
+
+# Matches the <img> tags markdown2 emits for post-relative or absolute image paths.
+# Other formats (GIF, SVG) are left alone, since resizing would break them.
+IMG_TAG = re.compile(r'<img src="(?:/post/)?images/([^"?#]+\.(?:jpe?g|png|webp))" alt="([^"]*)"\s*/?>', re.IGNORECASE)
+
+class ResponsiveImages:
+    """Builds resized WebP/AVIF variants of posts/images into a content-addressed cache.
+
+    Variants are named <sha256 prefix>-<width>.<ext>, so a changed original
+    gets new URLs and old ones can be cached forever. Without Pillow, posts
+    keep their plain <img> tags.
+    """
+
+    def __init__(self, images_dir, cache_dir, url_prefix):
+        self.images_dir = images_dir
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix.rstrip('/')
+        self.formats = [fmt for fmt in ('avif', 'webp') if Image and features.check(fmt)]
+        self._variants = {}  # name -> ((mtime_ns, size), variants dict)
+        self._locks = {}  # name -> threading.Lock held while that image builds
+        self._lock = threading.Lock()  # guards the two dicts only, never a build
+
+    def variants(self, name):
+        """Returns {'width', 'height', 'sources': {format: [(url, width)]}} for an image, building it once."""
+        path = os.path.join(self.images_dir, name)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._variants.get(name)
+            if cached and cached[0] == stamp: return cached[1]
+            lock = self._locks.setdefault(name, threading.Lock())
+        # Single-flight per image: concurrent renders of one image wait for one build,
+        # while other images (and cached lookups) carry on
+        with lock:
+            with self._lock: cached = self._variants.get(name)
+            if cached and cached[0] == stamp: return cached[1]
+            result = self._build(path)
+            with self._lock: self._variants[name] = (stamp, result)
+            return result
+
+    def rewrite(self, html):
+        """Replaces local <img> tags with lazy-loaded <picture> elements carrying srcsets."""
+        if Image is None: return html
+        return IMG_TAG.sub(self._picture, html)
+
+    def sources(self, html):
+        """Returns the paths of the originals that rewrite() would build variants of."""
+        if Image is None: return []
+        return [os.path.join(self.images_dir, match.group(1)) for match in IMG_TAG.finditer(html)
+                if '..' not in match.group(1).split('/')]
+
+    def _picture(self, match):
+        name, alt = match.group(1), match.group(2)
+        if '..' in name.split('/'): return match.group(0)
+        try: info = self.variants(name)
+        except Exception:
+            log.exception('Could not build variants for %s', name)
+            return match.group(0)
+
+        def srcset(fmt):
+            return ', '.join(f'{url} {width}w' for url, width in info['sources'][fmt])
+
+        sources = ''.join(
+            f'<source type="image/{fmt}" srcset="{srcset(fmt)}" sizes="{SIZES}">'
+            for fmt in self.formats
+        )
+        fallback = info['sources']['fallback']
+        return (
+            f'<picture>{sources}'
+            f'<img src="{fallback[-1][0]}" srcset="{srcset("fallback")}" sizes="{SIZES}" '
+            f'width="{info["width"]}" height="{info["height"]}" alt="{alt}" loading="lazy" decoding="async">'
+            f'</picture>'
+        )
+
+    def _build(self, path):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with Image.open(path) as original:
+            original.load()
+        width, height = original.size
+        widths = [w for w in WIDTHS if w < width] + [width]
+        # Browsers without AVIF/WebP get JPEG, or PNG if the original has transparency
+        fallback = 'png' if original.mode in ('RGBA', 'LA', 'P') else 'jpeg'
+        sources = {}
+        for key, fmt in [(fmt, fmt) for fmt in self.formats] + [('fallback', fallback)]:
+            sources[key] = []
+            for w in widths:
+                filename = f'{digest}-{w}.{"jpg" if fmt == "jpeg" else fmt}'
+                target = os.path.join(self.cache_dir, filename)
+                if not os.path.exists(target):
+                    resized = original if w == width else original.resize((w, round(height * w / width)), Image.LANCZOS)
+                    if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+                        resized = resized.convert('RGB')
+                    elif resized.mode not in ('RGB', 'RGBA'):
+                        resized = resized.convert('RGBA')
+                    options = {'quality': QUALITY[fmt]} if QUALITY[fmt] else {}
+                    tmp = f'{target}.{os.getpid()}.tmp'
+                    resized.save(tmp, format=fmt.upper(), **options)
+                    os.replace(tmp, target)
+                sources[key].append((f'{self.url_prefix}/{filename}', w))
+        return {"width": width, "height": height, "sources": sources}
@@ -0,0 +1,200 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+
+import markdown2
+from nicegui import background_tasks, ui
+
+from post_index import FENCE
+from render_cache import CODEHILITE_CSS, MARKDOWN_EXTRAS
+
+# Re-render once typing pauses this long, but at least every MAX_DELAY while it doesn't
+DEBOUNCE = 0.2
+MAX_DELAY = 1.0
+# Rendered blocks kept for reuse (undo, moved paragraphs)
+HTML_CACHE_SIZE = 4096
+
+LIST_ITEM = re.compile(r' {0,3}(?:[*+-]|\d{1,9}[.)])(?:\s|$)')
+
+def split_blocks(text):
+    """Splits markdown into top-level blocks, each with the blank lines that follow it.
+
+    Joined, the blocks give back exactly `text`. Fenced code stays in one
+    block, and so do loose lists with their indented continuations.
+    """
+    blocks = []
+    current = []
+    fence = None
+    blank = content = in_list = False
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if fence:
+            current.append(line)
+            if stripped.startswith(fence) and not stripped.strip(fence[0]): fence = None
+            continue
+        if not stripped:
+            current.append(line)
+            blank = True
+            continue
+        item = LIST_ITEM.match(line)
+        if blank and content and not (in_list and (line[0] in ' \t' or item)):
+            blocks.append(''.join(current))
+            current = []
+            content = False
+        if not content: in_list = bool(item)
+        blank = False
+        content = True
+        match = FENCE.match(line)
+        if match: fence = match.group(1)
+        current.append(line)
+    if current: blocks.append(''.join(current))
+    return blocks
+
+def diff_blocks(old, new):
+    """Returns (start, old_end, new_end): old[start:old_end] became new[start:new_end]."""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]: start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+class LivePreview:
+    """Markdown preview that only re-renders and re-sends the blocks that changed.
+
+    Each top-level block is its own element carrying its line count
+    (data-span), which is all the client needs for scroll sync. Call
+    schedule() on every edit; rendering waits for a pause in typing.
+    Blocks render independently, so reference-style links only resolve
+    within the block that defines them.
+    """
+
+    def __init__(self, extras=MARKDOWN_EXTRAS):
+        self.extras = list(extras)
+        self.blocks = []  # raw markdown chunks, in order
+        self.elements = []  # one ui.html per chunk
+        self._html = OrderedDict()  # chunk -> html
+        self._pending = None
+        self._first_pending = self._last_pending = 0.0
+        self._task = None  # renders once input settles; only exists while edits are pending
+        ui.add_head_html(f'<style>{CODEHILITE_CSS}</style>')
+        self.container = ui.element('div')
+
+    def set_content(self, text):
+        """Renders text now, patching only the blocks that differ from what is shown."""
+        self._pending = None
+        new = split_blocks(text)
+        start, old_end, new_end = diff_blocks(self.blocks, new)
+        # Reuse the elements of the changed range, then add or drop the difference
+        reused = start + min(old_end - start, new_end - start)
+        for i in range(start, reused):
+            self._show(self.elements[i], new[i])
+        for i in range(reused, new_end):
+            with self.container:
+                element = ui.html('', sanitize=False)
+            element.move(self.container, target_index=i)
+            self._show(element, new[i])
+            self.elements.insert(i, element)
+        for element in self.elements[reused:old_end]:
+            self.container.remove(element)
+        del self.elements[reused:old_end]
+        self.blocks = new
+
+    def schedule(self, text):
+        """Queues text for rendering once input settles (debounced)."""
+        now = time.monotonic()
+        if self._pending is None: self._first_pending = now
+        self._pending = text
+        self._last_pending = now
+        if self._task is None or self._task.done():
+            self._task = background_tasks.create(self._render_when_idle(), name='live_preview')
+
+    def sync_scroll(self, editor, scroller):
+        """Keeps a ui.codemirror and the scrolling element around this preview aligned, client-side."""
+        ui.add_head_html(f'<script>{SCROLL_SYNC_JS}</script>')
+        script = f'blogScrollSync({editor.id}, {scroller.id}, {self.container.id})'
+        ui.context.client.on_connect(lambda: ui.run_javascript(script))
+
+    async def _render_when_idle(self):
+        # Later edits push the deadline back (read afresh each time), up to MAX_DELAY
+        while self._pending is not None:
+            delay = min(self._last_pending + DEBOUNCE, self._first_pending + MAX_DELAY) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            if self.container.is_deleted: return
+            self.set_content(self._pending)
+
+    def _show(self, element, chunk):
+        html = self._html.get(chunk)
+        if html is None:
+            html = self._html[chunk] = markdown2.markdown(chunk, extras=self.extras)
+            if len(self._html) > HTML_CACHE_SIZE: self._html.popitem(last=False)
+        else:
+            self._html.move_to_end(chunk)
+        element.content = html
+        element.props(f'data-span={chunk.count(chr(10))}')
+
+# Maps the first visible editor line to a preview position and back. Block i
+# starts at line 1 + the data-span of the blocks before it.
+SCROLL_SYNC_JS = '''
+function blogScrollSync(editorId, scrollerId, blocksId) {
+    var scroller = document.getElementById("c" + scrollerId);
+    var blocks = document.getElementById("c" + blocksId);
+    var editor = getElement(editorId);
+    var view = editor && editor.editor;
+    if (!scroller || !blocks || !view) return setTimeout(function () { blogScrollSync(editorId, scrollerId, blocksId); }, 100);
+    if (scroller.dataset.scrollSync) return;
+    scroller.dataset.scrollSync = "1";
+    var ignore = null, frame = 0;
+
+    function starts() {
+        var lines = [], line = 1;
+        for (var i = 0; i < blocks.children.length; i++) {
+            lines.push(line);
+            line += +blocks.children[i].dataset.span || 0;
+        }
+        lines.push(line);
+        return lines;
+    }
+    function toPreview() {
+        var s = starts(), n = blocks.children.length;
+        if (!n) return;
+        var top = view.lineBlockAtHeight(view.scrollDOM.scrollTop);
+        var line = view.state.doc.lineAt(top.from).number + (view.scrollDOM.scrollTop - top.top) / Math.max(1, top.height);
+        var i = 0;
+        while (i < n - 1 && s[i + 1] <= line) i++;
+        var el = blocks.children[i], fraction = Math.min(1, (line - s[i]) / Math.max(1, s[i + 1] - s[i]));
+        scrollTo(scroller, el.offsetTop - blocks.children[0].offsetTop + fraction * el.offsetHeight);
+    }
+    function toEditor() {
+        var s = starts(), n = blocks.children.length;
+        if (!n) return;
+        var y = scroller.scrollTop + blocks.children[0].offsetTop, i = 0;
+        while (i < n - 1 && blocks.children[i + 1].offsetTop <= y) i++;
+        var el = blocks.children[i];
+        var line = s[i] + Math.min(1, (y - el.offsetTop) / Math.max(1, el.offsetHeight)) * (s[i + 1] - s[i]);
+        var number = Math.max(1, Math.min(view.state.doc.lines, Math.floor(line)));
+        var block = view.lineBlockAt(view.state.doc.line(number).from);
+        scrollTo(view.scrollDOM, block.top + (line - Math.floor(line)) * block.height);
+    }
+    function scrollTo(target, top) {
+        // The scroll event this causes must not echo back to the other pane
+        if (Math.abs(target.scrollTop - top) < 1) return;
+        ignore = target;
+        target.scrollTop = top;
+    }
+    function onScroll(target, sync) {
+        return function () {
+            if (ignore === target) { ignore = null; return; }
+            cancelAnimationFrame(frame);
+            frame = requestAnimationFrame(sync);
+        };
+    }
+    view.scrollDOM.addEventListener("scroll", onScroll(view.scrollDOM, toPreview), {passive: true});
+    scroller.addEventListener("scroll", onScroll(scroller, toEditor), {passive: true});
+}
+'''
@@ -1,18 +1,38 @@
-from nicegui import ui, app
-import glob
+from nicegui import ui, app, background_tasks, Client
+from fastapi import Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from http_cache import CachePolicy, PublicResponseCookies, cached_html, strong_etag
+from starlette.middleware.sessions import SessionMiddleware
 import frontmatter
-from datetime import datetime, date
+import markdown2
 import os
-import re
+import sys
+import time
+from datetime import date
+from post_index import PostIndex, parse_date, strip_markdown
+from post_loader import PostLoader
+from post_watcher import watch_posts
+from image_pipeline import ResponsiveImages
+from metrics import Metrics, storage_file_count
+from preferences import SQLitePreferences, create_preferences
+from render_cache import CODEHILITE_CSS, RenderCache
+from search_index import SearchIndex
+from static_site import export_site, render_blog, render_page, render_post, render_search, tag_url, template_fingerprint, template_mtime_ns
+from theme import FONT_ROUTE, FONTS_DIR, THEME_MOUNT_JS, theme_head
 
 # Get absolute path to the images directory
 base_dir = os.path.dirname(os.path.abspath(__file__))
-images_dir = os.path.join(base_dir, 'posts', 'images')
+# BLOG_POSTS_DIR points the app at another corpus (e.g. the benchmark generator's)
+posts_dir = os.environ.get('BLOG_POSTS_DIR', os.path.join(base_dir, 'posts'))
+images_dir = os.path.join(posts_dir, 'images')
 # Ensure directory exists
 if not os.path.exists(images_dir):
     os.makedirs(images_dir, exist_ok=True)
 
 app.add_static_files('/post/images', images_dir)
+# Self-hosted Inter (see theme.py)
+if os.path.isdir(FONTS_DIR):
+    app.add_static_files(FONT_ROUTE, FONTS_DIR)
 
 # --- INIT ---
 try:
@@ -28,112 +48,129 @@ LINKS = [
     {"name": "Blog", "url": "/blog", "icon": "article"},
     {"name": "Email", "url": "mailto:you@example.com", "icon": "email"},
 ]
+PAGE_SIZE = 10  # posts per /blog page (and per "Load more")
+# Serve /blog and /post/{filename} as plain HTML routes instead of NiceGUI pages,
+# so readers hold no websocket or server-side element tree.
+# Enable with `python main.py --read-only` or BLOG_READ_ONLY=1.
+READ_ONLY_PAGES = '--read-only' in sys.argv or os.environ.get('BLOG_READ_ONLY') == '1'
+# Cache-Control per route prefix (longest match wins). Page routes only use these
+# in read-only mode; NiceGUI pages carry per-client state and are never cached.
+CACHE_POLICIES = {
+    '/blog': 'public, max-age=60',
+    '/tag/': 'public, max-age=60',
+    '/post/': 'public, max-age=300',
+    '/post/images/': 'public, max-age=86400',
+    # Content-addressed responsive image variants (see image_pipeline.py)
+    '/post/images/.cache/': 'public, max-age=31536000, immutable',
+    # Font URLs carry a fingerprint (v=) and are served immutable; this covers bare ones
+    '/fonts/': 'public, max-age=86400',
+}
+# Where visitor preferences (dark mode) live: 'sqlite' (one shared file, the
+# default), 'cookie' (in the browser only, no server state) or 'storage' (the
+# old app.storage.user JSON file per visitor). Set with BLOG_PREFERENCES.
+# For several processes behind a load balancer use 'sqlite' on a shared
+# BLOG_PREFERENCES_DB path, or 'cookie'.
+PREFERENCES = os.environ.get('BLOG_PREFERENCES', 'sqlite')
+PREFERENCES_DB = os.environ.get('BLOG_PREFERENCES_DB', os.path.join(base_dir, '.preferences.sqlite3'))
+# Preferences (and the session cookie identifying a visitor) expire after this long unused
+PREFERENCE_MAX_AGE = 180 * 24 * 60 * 60
+# Cookie preferences need no session, so no session cookie is issued at all
+STORAGE_SECRET = None if PREFERENCES == 'cookie' else 'montano_secret_key'
+# Prometheus metrics on /metrics. Off by default; when off nothing is wrapped or
+# installed. Enable with `python main.py --metrics` or BLOG_METRICS=1.
+METRICS_ENABLED = '--metrics' in sys.argv or os.environ.get('BLOG_METRICS') == '1'
+# With metrics on, log requests slower than this (with an event loop stack sample); 0 disables
+SLOW_REQUEST_MS = int(os.environ.get('BLOG_SLOW_MS', 0))
+# Parsed post metadata saved across restarts, so a new process serves the full
+# index without parsing every post. Rebuild with `python main.py --rebuild-manifest`.
+POST_MANIFEST = os.environ.get('BLOG_MANIFEST', os.path.join(posts_dir, '.manifest.json'))
 
 # --- LOGIC ---
-def strip_markdown(text):
-    """Removes markdown syntax from text."""
-    # Remove headers (e.g. # Header)
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    # Remove bold/italic (e.g. **bold**, *italic*)
-    text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
-    text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
-    # Remove images (e.g. ![alt](url))
-    text = re.sub(r'!\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove links (e.g. [text](url))
-    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove code blocks (e.g. ```code```)
-    text = re.sub(r'`{3}.*?`{3}', '', text, flags=re.DOTALL)
-    # Remove inline code (e.g. `code`)
-    text = re.sub(r'`(.*?)`', r'\1', text)
-    # Remove blockquotes (e.g. > quote)
-    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
-    
-    return text.strip()
-
-def parse_date(date_str):
-    """Parses date string into a datetime.date object."""
-    if isinstance(date_str, datetime): return date_str.date()
-    if isinstance(date_str, date): return date_str
-    if not isinstance(date_str, str): return datetime.now().date()
-    
-    for fmt in ['%Y-%m-%d', '%d-%m-%Y', '%b %d, %Y', '%B %d, %Y']:
-        try: return datetime.strptime(date_str, fmt).date()
-        except: continue
-    return datetime.now().date()
+post_index = PostIndex(posts_dir, POST_MANIFEST)
+# One read at import; the watcher's first scan then re-checks it against the files
+post_index.load_manifest()
+app.on_shutdown(post_index.save_manifest)
+# Blocking post reads and parses run here, never on the event loop
+post_loader = PostLoader(max_workers=4)
 
 def get_posts():
-    """Retrieves and processes all markdown blog posts."""
-    if not os.path.exists("posts"): os.makedirs("posts", exist_ok=True)
-    posts = []
-    for file in glob.glob("posts/*.md"):
-        try:
-            post = frontmatter.load(file)
-            clean_content = strip_markdown(post.content)
-            posts.append({
-                "title": post.get('title', 'Untitled'),
-                "date": parse_date(post.get('date')),
-                "content": post.content.strip(),
-                "summary": clean_content[:126] + "...",
-                "filename": os.path.basename(file)
-            })
-        except: continue
-    return sorted(posts, key=lambda x: x['date'], reverse=True)
+    """Retrieves all blog posts from the in-memory index, newest first."""
+    return post_index.posts()
+
+# Keep the index current from filesystem events instead of stat-ing per request
+app.on_startup(lambda: background_tasks.create(watch_posts(post_index), name='watch_posts'))
+
+# Full-text search, kept in step with the post index and persisted across restarts
+search_index = SearchIndex(posts_dir, os.path.join(posts_dir, '.search-index.json'))
+
+def load_search_index():
+    search_index.load()
+    if search_index.sync(): search_index.save()
+
+def update_search_index(names):
+    """PostIndex listener: re-indexes changed posts on the I/O pool, never on the loop."""
+    background_tasks.create(post_loader.run(('search', frozenset(names)), search_index.update, names),
+                            name='search_index')
+
+async def start_search_index():
+    await post_loader.run('search_index', load_search_index)
+    post_index.listeners.append(update_search_index)
+    # Catches posts changed while the first sync ran, before the listener was there (stat only)
+    await post_loader.run('search_index', search_index.sync)
+
+app.on_startup(lambda: background_tasks.create(start_search_index(), name='start_search_index'))
+app.on_shutdown(search_index.save)
+
+# Rendered post HTML, warmed at startup so first views skip markdown conversion
+responsive_images = ResponsiveImages(images_dir, os.path.join(images_dir, '.cache'), '/post/images/.cache')
+render_cache = RenderCache(postprocess=responsive_images.rewrite, dependencies=responsive_images.sources)
+# Only the newest posts, as many as the cache holds (their images get variants built too)
+app.on_startup(lambda: post_loader.run('warm', render_cache.warm, [
+    os.path.join(posts_dir, post['filename']) for post in post_index.posts()[:render_cache.max_entries]]))
+
+def load_rendered(filename):
+    """Returns (rendered post, mtime_ns), or (None, 0) if there is no such post."""
+    # Only indexed posts, never the manifest, search index or other files beside them
+    filepath = os.path.join(posts_dir, filename)
+    if filename not in post_index or not os.path.isfile(filepath): return None, 0
+    post = render_cache.render_post(filepath)
+    # A replaced image changes the page (its variant URLs) without touching the post
+    return post, max(os.stat(filepath).st_mtime_ns, post['assets_mtime_ns'])
+
+async def load_post_async(filename):
+    """load_rendered() on the I/O pool, sharing one load between concurrent readers."""
+    return await post_loader.run(('post', filename), load_rendered, filename)
+
+async def refresh_index():
+    """Brings the post index up to date off the event loop (a no-op while the watcher runs)."""
+    if not post_index.watched:
+        post_index.notify(await post_loader.run('index', post_index.refresh, False))
+
+preferences = create_preferences(PREFERENCES, PREFERENCES_DB, PREFERENCE_MAX_AGE)
+if isinstance(preferences, SQLitePreferences):
+    app.on_startup(lambda: background_tasks.create(preferences.run(), name='preferences'))
+
+# Font, CSS and dark mode bootstrap for every page, built once. Toggles never
+# reach the server directly: the browser syncs them later to /api/preferences,
+# or in cookie mode writes the cookie itself.
+THEME_HEAD = theme_head(None if PREFERENCES == 'cookie' else '/api/preferences', max_age=PREFERENCE_MAX_AGE)
+# Apply the browser's choice before Vue mounts instead of NiceGUI's default
+app.config.vue_config_script += THEME_MOUNT_JS
+
+def on_posts_changed(callback):
+    """Calls callback(filenames) on post changes for as long as the current client lives."""
+    post_index.listeners.append(callback)
+    ui.context.client.on_delete(lambda: post_index.listeners.remove(callback))
 
 # --- UI HELPERS ---
 def common_style():
-    """Applies global styles and dark mode."""
-    # Initialize Persistent Dark Mode logic early
-    if 'dark_mode' not in app.storage.user:
-        app.storage.user['dark_mode'] = False
-        
-    # Prevent FOUC: Conditionally inject CSS to force background color immediately
-    # This runs in HEAD, before body exists, guaranteeing no white flash.
-    if app.storage.user['dark_mode']:
-        ui.add_head_html('''
-            <style>
-                html.dark body { background-color: #121212 !important; color: white !important; }
-            </style>
-            <script>
-                document.documentElement.classList.add("dark");
-            </script>
-        ''')
-    else:
-        ui.add_head_html('''
-            <script>
-                document.documentElement.classList.remove("dark");
-            </script>
-        ''')
-
-    ui.add_head_html('<link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">')
-    ui.add_head_html('''
-        <style>
-            body { font-family: 'Inter', sans-serif; background-color: white; color: #121212; transition: background-color 0.3s, color 0.3s; }
-            /* Tailwind/NiceGUI often target body, but we support html.dark too for early loading */
-            html.dark body, body.dark { background-color: #121212 !important; color: white !important; }
-            
-            .nicegui-content { padding: 0 !important; max-width: 100% !important; }
-            a { text-decoration: none; color: inherit; }
-        </style>
-    ''')
-    
-    # Initialize UI Dark Mode Component
-    dark = ui.dark_mode()
-    dark.bind_value(app.storage.user, 'dark_mode')
-
-    # Sync proper classes via JS for runtime toggles
-    def sync_classes(e):
-        if e.value:
-            ui.run_javascript('document.documentElement.classList.add("dark"); document.body.classList.add("dark");')
-        else:
-            ui.run_javascript('document.documentElement.classList.remove("dark"); document.body.classList.remove("dark");')
-    
-    # Fix the toggle button state
-    if dark.value:
-        # Ensure consistency on python side load
-        ui.run_javascript('document.body.classList.add("dark");')
+    """Applies global styles and dark mode (see theme.theme_head)."""
+    ui.add_head_html(THEME_HEAD)
 
-    # Listener for changes
-    dark.on_value_change(sync_classes)
+def dark_toggle():
+    """Renders a dark mode button; it toggles in the browser, without a server round trip."""
+    return ui.button(icon='dark_mode').on('click', js_handler='() => blogTheme.toggle()') \
+        .props('flat round dense').classes('text-gray-600 dark:text-white/60 hover:text-black dark:hover:text-white')
 
 def nav_header():
     """Renders the navigation header."""
@@ -146,14 +183,11 @@ def nav_header():
                 ui.label('Home')
             with ui.link(target='/blog').classes('text-sm text-gray-600 dark:text-white/60 hover:text-black dark:hover:text-white transition'):
                 ui.label('Blog')
+            with ui.link(target='/search').classes('text-sm text-gray-600 dark:text-white/60 hover:text-black dark:hover:text-white transition'):
+                ui.label('Search')
             
             # Dark Mode Toggle
-            # Toggle storage directly; the binding in common_style handles the rest
-            def toggle_dark():
-                app.storage.user['dark_mode'] = not app.storage.user.get('dark_mode', False)
-                
-            with ui.button(icon='dark_mode', on_click=toggle_dark).props('flat round dense').classes('text-gray-600 dark:text-white/60 hover:text-black dark:hover:text-white'):
-                pass
+            dark_toggle()
 
 # --- PAGES ---
 
@@ -163,12 +197,8 @@ def home():
     common_style()
     
     # Dark Mode Toggle (Absolute Position)
-    def toggle_dark():
-        app.storage.user['dark_mode'] = not app.storage.user.get('dark_mode', False)
-
     with ui.element('div').classes('absolute top-4 right-4 z-50'):
-         with ui.button(icon='dark_mode', on_click=toggle_dark).props('flat round dense').classes('text-gray-600 dark:text-white/60 hover:text-black dark:hover:text-white'):
-            pass
+        dark_toggle()
 
     with ui.column().classes('w-full h-screen items-center justify-center transition-colors duration-300'):
         ui.label(HERO_TITLE).classes('text-6xl md:text-8xl font-black tracking-tighter text-gray-900 dark:text-white/90 mb-4')
@@ -181,40 +211,109 @@ def home():
                         ui.icon(link['icon']).classes('text-xl text-gray-600 dark:text-white/80')
                         ui.label(link['name']).classes('text-sm font-semibold text-gray-700 dark:text-white/80')
 
-@ui.page('/blog')
-def blog():
-    """Renders the blog index page."""
+def post_card(post):
+    """Renders one entry of a post listing."""
+    with ui.link(target=f"/post/{post['filename']}").classes('group w-full'):
+        with ui.column().classes('gap-1'): 
+            ui.label(post['title']).classes('text-xl font-bold text-gray-900 dark:text-white/90 group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors')
+            ui.label(post['date'].strftime('%B %d, %Y')).classes('text-xs text-gray-400 dark:text-white/40 font-mono uppercase tracking-widest')
+            ui.label(post['summary']).classes('text-sm text-gray-600 dark:text-white/60 leading-relaxed max-w-2xl mt-1')
+
+def browse_links():
+    """Renders links to the year archives and tag listings."""
+    link_classes = 'text-xs text-gray-500 dark:text-white/50 hover:text-black dark:hover:text-white transition'
+    with ui.row().classes('gap-x-4 gap-y-1 items-center'):
+        for year, count in post_index.years():
+            ui.link(f'{year} ({count})', f'/blog/{year}').classes(link_classes)
+        for tag, count in post_index.tags():
+            ui.link(f'#{tag} ({count})', tag_url(tag)).classes(link_classes)
+
+def post_listing(heading, posts_for, page=1, url='/blog'):
+    """Renders a date-ordered post listing, PAGE_SIZE posts at a time.
+
+    posts_for() returns the full pre-sorted list from the index; only the
+    visible window is turned into elements, and "Load more" appends the
+    next window in place.
+    """
     common_style()
+    page = max(page, 1)
+    start = (page - 1) * PAGE_SIZE
+    shown = {'end': start}
     with ui.column().classes('w-full min-h-screen items-center pt-4 px-4 transition-colors duration-300'):
         nav_header()
         
         with ui.column().classes('w-full max-w-3xl gap-6'):
-            ui.label('Latest Writing').classes('text-xs font-bold text-gray-400 dark:text-white/40 uppercase tracking-widest mb-2')
-            
-            posts = get_posts()
-            if not posts: ui.label('No posts found.').classes('text-gray-400 dark:text-white/40 italic')
-
-            for post in posts:
-                with ui.link(target=f"/post/{post['filename']}").classes('group w-full'):
-                    with ui.column().classes('gap-1'): 
-                        ui.label(post['title']).classes('text-xl font-bold text-gray-900 dark:text-white/90 group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors')
-                        ui.label(post['date'].strftime('%B %d, %Y')).classes('text-xs text-gray-400 dark:text-white/40 font-mono uppercase tracking-widest')
-                        ui.label(post['summary']).classes('text-sm text-gray-600 dark:text-white/60 leading-relaxed max-w-2xl mt-1')
-
-@ui.page('/post/{filename}')
-def post_page(filename: str):
+            ui.label(heading).classes('text-xs font-bold text-gray-400 dark:text-white/40 uppercase tracking-widest mb-2')
+            browse_links()
+            if page > 1:
+                ui.link('Newer posts', f'{url}?page={page - 1}').classes('text-sm text-blue-600 dark:text-blue-400')
+
+            cards = ui.column().classes('w-full gap-6')
+            more = ui.button('Load more', on_click=lambda: show_more()) \
+                .props('flat no-caps').classes('self-center text-gray-600 dark:text-white/60')
+
+            def show_more():
+                posts = posts_for()
+                with cards:
+                    for post in posts[shown['end']:shown['end'] + PAGE_SIZE]:
+                        post_card(post)
+                shown['end'] += PAGE_SIZE
+                more.set_visibility(shown['end'] < len(posts))
+
+            def rebuild(_=None):
+                target = max(shown['end'], start + PAGE_SIZE)
+                cards.clear()
+                shown['end'] = start
+                if not posts_for():
+                    with cards: ui.label('No posts found.').classes('text-gray-400 dark:text-white/40 italic')
+                while shown['end'] < target:
+                    show_more()
+
+            rebuild()
+            on_posts_changed(rebuild)
+
+async def blog(page: int = 1):
+    """Renders the blog index page."""
+    await refresh_index()
+    post_listing('Latest Writing', get_posts, page)
+
+def archive_period(year, month=None):
+    """Parses the year and month of an archive path; None unless they name a real month or year."""
+    # Taken as strings so /blog/abc is a 404 like any other bad archive path, not a 422
+    if not year.isdecimal() or not (month is None or month.isdecimal()): return None
+    year, month = int(year), month and int(month)
+    if not 1 <= year <= 9999 or month is not None and not 1 <= month <= 12: return None
+    return year, month
+
+async def archive_page(year: str, month: str | None = None, page: int = 1):
+    """Renders the posts from one year or month."""
+    period = archive_period(year, month)
+    if period is None:
+        common_style()
+        ui.label('404').classes('text-red-500 m-10')
+        return
+    year, month = period
+    heading = date(year, month, 1).strftime('%B %Y') if month else str(year)
+    url = f'/blog/{year}/{month}' if month else f'/blog/{year}'
+    await refresh_index()
+    post_listing(f'Posts from {heading}', lambda: post_index.archive(year, month), page, url)
+
+async def tag_page(tag: str, page: int = 1):
+    """Renders the posts carrying a tag."""
+    await refresh_index()
+    post_listing(f'Tagged #{tag}', lambda: post_index.tagged(tag), page, tag_url(tag))
+
+async def post_page(filename: str):
     """Renders an individual blog post page."""
     common_style()
-    filepath = os.path.join("posts", filename)
+    ui.add_head_html(f'<style>{CODEHILITE_CSS}</style>')
+    await refresh_index()
+    post, _ = await load_post_async(filename)
     
-    if not os.path.exists(filepath):
+    if post is None:
         ui.label('404').classes('text-red-500 m-10')
         return
 
-    post = frontmatter.load(filepath)
-    title = post.get('title', 'Untitled')
-    date_obj = parse_date(post.get('date'))
-    
     # Main Container
     with ui.column().classes(
         'w-full min-h-screen items-center '
@@ -235,26 +334,211 @@ def post_page(filename: str):
                 )
                 ui.label('Back to Blog').classes('text-sm font-medium')
 
-            # Title
-            ui.label(title).classes(
-                'text-4xl md:text-5xl font-black tracking-tight '
-                'text-gray-900 dark:text-white mb-0 leading-tight'
-            )
-            
-            # Date & Divider
-            ui.label(date_obj.strftime('%B %d, %Y')).classes(
-                'text-sm text-gray-400 dark:text-white/40 font-mono '
-                'border-b border-gray-200 dark:border-[#222] w-full pt-2 pb-2 mb-4'
-            )
-            
-            # Markdown Content
-            ui.markdown(post.content).classes(
-                'prose dark:prose-invert prose-lg max-w-none '
-                'prose-headings:font-bold prose-headings:text-gray-900 dark:prose-headings:text-white/90 '
-                'prose-p:text-gray-700 dark:prose-p:text-white/80 prose-a:text-blue-600 dark:prose-a:text-blue-400 '
-                'prose-img:rounded-xl '
-                'prose-h1:mt-0 prose-h2:mt-1 prose-p:mt-0'
-            )
+            # Re-rendered in place when the file changes on disk
+            @ui.refreshable
+            def post_body(post):
+                if post is None:
+                    ui.label('This post has been removed.').classes('text-gray-400 dark:text-white/40 italic')
+                    return
+
+                title = post['title']
+                date_obj = post['date']
+
+                # Title
+                ui.label(title).classes(
+                    'text-4xl md:text-5xl font-black tracking-tight '
+                    'text-gray-900 dark:text-white mb-0 leading-tight'
+                )
+                
+                # Date & Divider
+                ui.label(date_obj.strftime('%B %d, %Y')).classes(
+                    'text-sm text-gray-400 dark:text-white/40 font-mono '
+                    'border-b border-gray-200 dark:border-[#222] w-full pt-2 pb-2 mb-4'
+                )
+                
+                # Markdown Content (pre-rendered; posts are trusted local files)
+                ui.html(post['html'], sanitize=False).classes(
+                    'nicegui-markdown prose dark:prose-invert prose-lg max-w-none '
+                    'prose-headings:font-bold prose-headings:text-gray-900 dark:prose-headings:text-white/90 '
+                    'prose-p:text-gray-700 dark:prose-p:text-white/80 prose-a:text-blue-600 dark:prose-a:text-blue-400 '
+                    'prose-img:rounded-xl '
+                    'prose-h1:mt-0 prose-h2:mt-1 prose-p:mt-0'
+                )
+
+            post_body(post)
+
+            async def reload():
+                post_body.refresh((await load_post_async(filename))[0])
+
+            on_posts_changed(lambda names: background_tasks.create(reload()) if filename in names else None)
+
+def search_page(q: str = ''):
+    """Renders the search page with live results."""
+    common_style()
+    with ui.column().classes('w-full min-h-screen items-center pt-4 px-4 transition-colors duration-300'):
+        nav_header()
+
+        with ui.column().classes('w-full max-w-3xl gap-6'):
+            @ui.refreshable
+            def results(query):
+                if not query.strip(): return
+                matches = search_index.search(query)
+                if not matches: ui.label('No matching posts.').classes('text-gray-400 dark:text-white/40 italic')
+
+                for match in matches:
+                    with ui.link(target=f"/post/{match['filename']}").classes('group w-full'):
+                        with ui.column().classes('gap-1'):
+                            ui.label(match['title']).classes('text-xl font-bold text-gray-900 dark:text-white/90 group-hover:text-blue-600 dark:group-hover:text-blue-400 transition-colors')
+                            ui.html(match['snippet'], sanitize=False).classes('text-sm text-gray-600 dark:text-white/60 leading-relaxed max-w-2xl mt-1')
+
+            ui.input(placeholder='Search posts', value=q,
+                     on_change=lambda e: results.refresh(e.value or '')) \
+                .props('autofocus clearable debounce=200').classes('w-full')
+            results(q)
+
+@app.get('/api/search')
+def search_api(q: str = '', limit: int = 20):
+    """Returns ranked search results as JSON."""
+    return {"query": q, "results": search_index.search(q, min(limit, 100))}
+
+@app.get('/api/stats')
+def stats_api():
+    """Returns cache and I/O pool counters; a growing queue_depth means the pool is saturated."""
+    return {"index": post_index.stats(), "render_cache": render_cache.stats(), "post_loader": post_loader.stats()}
+
+if PREFERENCES != 'cookie':
+    @app.get('/api/preferences')
+    def preferences_api(request: Request):
+        """Returns the stored preferences; the browser asks only when its own copy is gone."""
+        return {"dark_mode": preferences.get(request, 'dark_mode')}
+
+    @app.post('/api/preferences')
+    async def save_preferences_api(request: Request):
+        """Stores preferences synced by the browser after a toggle."""
+        try: body = await request.json()
+        except ValueError: body = None  # JSONDecodeError and bad UTF-8 alike
+        if not isinstance(body, dict): return JSONResponse({"ok": False}, status_code=400)
+        if isinstance(body.get('dark_mode'), bool): preferences.set(request, 'dark_mode', body['dark_mode'])
+        return {"ok": True}
+
+# --- READ-ONLY ROUTES ---
+cache_policy = CachePolicy(CACHE_POLICIES)
+cache_policy.install(app, '/post/images/', '/fonts/')
+template_hash = template_fingerprint()
+template_mtime = template_mtime_ns()
+
+def listing_html(request, heading, posts, page, url):
+    """Renders one page of a post listing as plain HTML, answering 304 when unchanged."""
+    page = max(page, 1)
+    start = (page - 1) * PAGE_SIZE
+    window = posts[start:start + PAGE_SIZE]
+    newer = f'{url}?page={page - 1}' if page > 1 else None
+    older = f'{url}?page={page + 1}' if start + PAGE_SIZE < len(posts) else None
+    return cached_html(request,
+                       lambda: render_blog(HERO_TITLE, window, heading, newer, older, post_index.years(), post_index.tags()),
+                       # No Last-Modified: deleting the newest post would move it backwards
+                       strong_etag(template_hash, HERO_TITLE, post_index.digest, url, str(page)), None,
+                       cache_policy.for_path(url))
+
+def blog_html(request: Request, page: int = 1):
+    """Renders the blog index as plain HTML."""
+    return listing_html(request, 'Latest Writing', get_posts(), page, '/blog')
+
+def archive_html(request: Request, year: str, month: str | None = None, page: int = 1):
+    """Renders a year or month archive as plain HTML."""
+    period = archive_period(year, month)
+    if period is None:
+        return HTMLResponse(render_page('404', '<p class="meta">404</p>'), status_code=404)
+    year, month = period
+    heading = date(year, month, 1).strftime('%B %Y') if month else str(year)
+    url = f'/blog/{year}/{month}' if month else f'/blog/{year}'
+    return listing_html(request, f'Posts from {heading}', post_index.archive(year, month), page, url)
+
+def tag_html(request: Request, tag: str, page: int = 1):
+    """Renders a tag listing as plain HTML."""
+    return listing_html(request, f'Tagged #{tag}', post_index.tagged(tag), page, tag_url(tag))
+
+async def post_html(request: Request, filename: str):
+    """Renders a post as plain HTML from the render cache, answering 304 when unchanged."""
+    await refresh_index()
+    post, mtime_ns = await load_post_async(filename)
+    if post is None:
+        return HTMLResponse(render_page('404', '<p class="meta">404</p>'), status_code=404)
+    return cached_html(request, lambda: render_post(HERO_TITLE, post),
+                       strong_etag(template_hash, HERO_TITLE, post['hash']), max(mtime_ns, template_mtime),
+                       cache_policy.for_path(f'/post/{filename}'))
+
+def search_html(q: str = ''):
+    """Renders search results as plain HTML (a GET form, no websocket)."""
+    return HTMLResponse(render_search(HERO_TITLE, q, search_index.search(q) if q.strip() else []),
+                        headers={'Cache-Control': cache_policy.for_path('/search')})
+
+if READ_ONLY_PAGES:
+    app.api_route('/blog', methods=['GET', 'HEAD'])(blog_html)
+    app.api_route('/blog/{year}', methods=['GET', 'HEAD'])(archive_html)
+    app.api_route('/blog/{year}/{month}', methods=['GET', 'HEAD'])(archive_html)
+    app.api_route('/tag/{tag:path}', methods=['GET', 'HEAD'])(tag_html)
+    app.api_route('/post/{filename}', methods=['GET', 'HEAD'])(post_html)
+    app.api_route('/search', methods=['GET', 'HEAD'])(search_html)
+else:
+    ui.page('/blog')(blog)
+    ui.page('/blog/{year}')(archive_page)
+    ui.page('/blog/{year}/{month}')(archive_page)
+    ui.page('/tag/{tag:path}')(tag_page)
+    ui.page('/post/{filename}')(post_page)
+    ui.page('/search')(search_page)
+
+# --- METRICS ---
+if METRICS_ENABLED:
+    metrics = Metrics(SLOW_REQUEST_MS)
+    metrics.install(app)
+    # Module attributes are looked up per call, so every caller picks these up
+    metrics.wrap(frontmatter, 'load', 'frontmatter_load')
+    metrics.wrap(frontmatter, 'loads', 'frontmatter_load')
+    metrics.wrap(markdown2, 'markdown', 'markdown')
+    common_style = metrics.timed('common_style')(common_style)
+
+    metrics.gauge('blog_clients', 'NiceGUI clients (one per open page).', lambda: len(Client.instances))
+    metrics.gauge('blog_clients_connected', 'NiceGUI clients with a live websocket.',
+                  lambda: sum(client.has_socket_connection for client in list(Client.instances.values())))
+    metrics.gauge('blog_storage_files', 'Files in the app.storage directory.', lambda: storage_file_count(app.storage.path))
+    metrics.gauge('blog_post_loader_queue_depth', 'Post loads waiting for an I/O worker.', lambda: post_loader.queued)
+    metrics.gauge('blog_render_cache_bytes', 'Rendered HTML held in the render cache.', lambda: render_cache.bytes)
+
+    @app.get('/metrics')
+    def metrics_api():
+        """Returns all metrics in Prometheus text format."""
+        return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+# --- SESSION ---
+# Added here rather than by ui.run (which then keeps it), so that PublicResponseCookies
+# can sit outside it and keep the session cookie off publicly cacheable responses.
+if STORAGE_SECRET:
+    app.add_middleware(SessionMiddleware, secret_key=STORAGE_SECRET, max_age=PREFERENCE_MAX_AGE)
+app.add_middleware(PublicResponseCookies)
+
+def export(out_dir):
+    """Writes the whole site as static HTML (see static_site.py)."""
+    stats = export_site(out_dir, post_index, render_cache, images_dir, HERO_TITLE, HERO_SUBTITLE, LINKS)
+    print(f"Exported to {out_dir}: {stats['written']} written, {stats['skipped']} unchanged")
+
+def rebuild_manifest():
+    """Re-parses every post and rewrites the manifest from scratch."""
+    start = time.perf_counter()
+    index = PostIndex(posts_dir, POST_MANIFEST)
+    index.refresh(False)
+    index.save_manifest(force=True)
+    print(f"Wrote {POST_MANIFEST}: {len(index.posts())} posts in {time.perf_counter() - start:.2f}s")
 
 if __name__ in {"__main__", "__mp_main__"}:
-    ui.run(host='0.0.0.0', port=8080, title='Montano.uk', storage_secret='montano_secret_key')
\ No newline at end of file
+    if '--export' in sys.argv:
+        # python main.py --export out/
+        args = sys.argv[sys.argv.index('--export') + 1:]
+        export(args[0] if args else 'out')
+        raise SystemExit
+    if '--rebuild-manifest' in sys.argv:
+        rebuild_manifest()
+        raise SystemExit
+    ui.run(host='0.0.0.0', port=int(os.environ.get('BLOG_PORT', 8080)), title='Montano.uk',
+           storage_secret=STORAGE_SECRET,
+           reload=os.environ.get('BLOG_RELOAD', '1') == '1')
\ No newline at end of file
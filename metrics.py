@@ -0,0 +1,159 @@
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+log = logging.getLogger(__name__)
+
+# Prometheus' default buckets (seconds); fine enough for whole requests
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# For the individual steps inside a request
+STEP_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Innermost frames kept in a slow-request stack sample
+STACK_DEPTH = 15
+
+class Histogram:
+    """A Prometheus histogram with one label. Thread-safe: steps run on the I/O pool too."""
+
+    def __init__(self, name, help, label, buckets):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound: series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts)) for key, counts in self._series.items())
+        for key, counts in series:
+            label = f'{self.label}="{_escape(key)}"'
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {counts[-1]}')
+            lines.append(f'{self.name}_sum{{{label}}} {counts[-2]:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {counts[-1]}')
+        return lines
+
+class Metrics:
+    """Request and step timings plus scrape-time gauges, rendered in Prometheus text format.
+
+    Nothing here is wired in until install() and wrap() are called, so a
+    server started without metrics runs exactly the uninstrumented code.
+    """
+
+    def __init__(self, slow_request_ms=0):
+        self.requests = Histogram('blog_request_duration_seconds', 'HTTP request latency by route.',
+                                  'route', REQUEST_BUCKETS)
+        self.steps = Histogram('blog_step_duration_seconds', 'Time spent in instrumented steps.',
+                               'step', STEP_BUCKETS)
+        self.gauges = []  # (name, help, fn)
+        self.slow = SlowRequestLog(slow_request_ms / 1000) if slow_request_ms else None
+
+    def gauge(self, name, help, fn):
+        """Registers a gauge whose value fn() is read at scrape time."""
+        self.gauges.append((name, help, fn))
+
+    def timed(self, step):
+        """Decorator recording each call's duration under `step`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.steps.observe(step, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def wrap(self, owner, attr, step):
+        """Replaces owner.attr (a module or class function) with a timed version."""
+        setattr(owner, attr, self.timed(step)(getattr(owner, attr)))
+
+    def install(self, app):
+        """Adds the timing middleware; requests are labelled by route template, not raw path."""
+        @app.middleware('http')
+        async def request_timing(request, call_next):
+            start = time.perf_counter()
+            if self.slow: token = self.slow.begin(request.url.path)
+            try:
+                return await call_next(request)
+            finally:
+                route = getattr(request.scope.get('route'), 'path', None) or 'unmatched'
+                elapsed = time.perf_counter() - start
+                self.requests.observe(route, elapsed)
+                if self.slow: self.slow.end(token, elapsed)
+
+    def render(self):
+        lines = self.requests.render() + self.steps.render()
+        for name, help, fn in self.gauges:
+            try: value = fn()
+            except Exception: continue
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+class SlowRequestLog:
+    """Logs requests slower than a threshold, with a stack sample of the event loop thread.
+
+    A daemon thread samples while the request is still running, so the log
+    shows what the loop was busy with, even when it was blocked outright.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._active = {}  # token -> [path, started, sample]
+        self._lock = threading.Lock()
+        self._next = 0
+        self._loop_thread = threading.get_ident()
+        threading.Thread(target=self._sampler, name='slow-request-sampler', daemon=True).start()
+
+    def begin(self, path):
+        self._loop_thread = threading.get_ident()
+        with self._lock:
+            self._next += 1
+            self._active[self._next] = [path, time.perf_counter(), None]
+            return self._next
+
+    def end(self, token, elapsed):
+        with self._lock:
+            path, _, sample = self._active.pop(token)
+        if elapsed >= self.threshold:
+            log.warning('Slow request %s took %.0f ms%s', path, elapsed * 1000,
+                        '; event loop stack:\n' + sample if sample else '')
+
+    def _sampler(self):
+        while True:
+            time.sleep(self.threshold / 2)
+            now = time.perf_counter()
+            with self._lock:
+                due = [entry for entry in self._active.values() if entry[2] is None and now - entry[1] >= self.threshold]
+            if not due: continue
+            frame = sys._current_frames().get(self._loop_thread)
+            sample = ''.join(traceback.format_stack(frame, limit=STACK_DEPTH)) if frame else None
+            for entry in due: entry[2] = sample
+
+def storage_file_count(path):
+    """Counts app.storage files (one per browser for storage.user) under NiceGUI's storage path."""
+    try:
+        with os.scandir(path) as entries:
+            return sum(1 for entry in entries if entry.name.startswith('storage-') and entry.name.endswith('.json'))
+    except OSError:
+        return 0
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
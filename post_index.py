@@ -0,0 +1,463 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, date
+
+import frontmatter
+
+log = logging.getLogger(__name__)
+
+SUMMARY_LENGTH = 126
+# Without a watcher, reads within this many seconds of the last scan reuse it
+RESCAN_INTERVAL = 1.0
+# Bumped whenever the manifest layout or the parsed post fields change
+MANIFEST_VERSION = 1
+
+# --- PARSING ---
+def strip_markdown(text):
+    """Removes markdown syntax from text."""
+    # Remove headers (e.g. # Header)
+    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
+    # Remove bold/italic (e.g. **bold**, *italic*)
+    text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
+    text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
+    # Remove images (e.g. ![alt](url))
+    text = re.sub(r'!\[(.*?)\]\(.*?\)', r'\1', text)
+    # Remove links (e.g. [text](url))
+    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
+    # Remove code blocks (e.g. ```code```)
+    text = re.sub(r'`{3}.*?`{3}', '', text, flags=re.DOTALL)
+    # Remove inline code (e.g. `code`)
+    text = re.sub(r'`(.*?)`', r'\1', text)
+    # Remove blockquotes (e.g. > quote)
+    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+
+    return text.strip()
+
+# Single-pass summary extraction. Unlike strip_markdown it only reads as much
+# of the body as the summary needs, and it only strips markup that is balanced,
+# so snake_case identifiers and stray brackets survive intact.
+FENCE = re.compile(r' {0,3}(`{3,}|~{3,})')
+QUOTE = re.compile(r'(?:>\s?)+')
+HEADER = re.compile(r'#+(?:\s+|$)')
+INLINE_SPECIAL = re.compile(r'[\\`!\[*_]')
+
+def summarize(text, limit=SUMMARY_LENGTH):
+    """Returns up to `limit` characters of plain text from markdown, cut at a word boundary."""
+    words = []
+    length = -1
+    fence = None
+    pos, n = 0, len(text)
+    while pos < n and length <= limit:
+        end = text.find('\n', pos)
+        if end == -1: end = n
+        line = text[pos:end]
+        pos = end + 1
+
+        # Skip fenced code blocks (an unclosed fence runs to the end, as in CommonMark)
+        if fence:
+            closing = line.strip()
+            if closing.startswith(fence) and not closing.strip(fence[0]): fence = None
+            continue
+        match = FENCE.match(line)
+        if match:
+            fence = match.group(1)
+            continue
+
+        line = line.strip()
+        match = QUOTE.match(line)
+        if match: line = line[match.end():]
+        match = HEADER.match(line)
+        if match: line = line[match.end():]
+        # Words come out lazily, so a long line is only read until the summary is full
+        for word in _words(_inline(line, 0, len(line), _Spans(line)), limit + 1 - length):
+            words.append(word)
+            length += len(word) + 1
+            if length > limit: break
+
+    summary = ' '.join(words)
+    if len(summary) <= limit: return summary
+    cut = summary[:limit + 1]
+    cut = cut[:cut.rindex(' ')] if ' ' in cut else cut[:limit]
+    return cut.rstrip(' ,;:-') + '...'
+
+def _words(pieces, longest):
+    """Joins text pieces into whitespace-separated words, giving up on a word once it is `longest` long."""
+    word, size = [], 0
+    for piece in pieces:
+        if not piece: continue
+        parts = piece.split()
+        if word and (not parts or piece[0].isspace()):
+            yield ''.join(word)
+            word, size = [], 0
+        for k, part in enumerate(parts):
+            if k:
+                yield ''.join(word)
+                word, size = [], 0
+            word.append(part)
+            size += len(part)
+            if size >= longest:
+                yield ''.join(word)[:longest]
+                return
+        if word and piece[-1].isspace():
+            yield ''.join(word)
+            word, size = [], 0
+    if word: yield ''.join(word)
+
+def _inline(s, lo, hi, spans):
+    """Yields s[lo:hi] piece by piece with balanced inline markup (emphasis, code, links, images) stripped."""
+    i = lo
+    while i < hi:
+        match = INLINE_SPECIAL.search(s, i, hi)
+        if not match:
+            yield s[i:hi]
+            return
+        yield s[i:match.start()]
+        i = match.start()
+        c = s[i]
+        if c == '\\' and i + 1 < hi:
+            yield s[i + 1]
+            i += 2
+        elif c == '`':
+            run = _run_length(s, i, hi)
+            close = spans.closer(c, run, i + run, hi)
+            if close == -1:
+                yield s[i:i + run]
+                i += run
+            else:
+                yield s[i + run:close].strip()
+                i = close + run
+        elif c == '[' or (c == '!' and s.startswith('[', i + 1, hi)):
+            link = spans.link(i + 1 if c == '!' else i, hi)
+            if link:
+                yield from _inline(s, link[0], link[1], spans)
+                i = link[2]
+            else:
+                yield c
+                i += 1
+        elif c in '*_':
+            run = _run_length(s, i, hi)
+            before = s[i - 1] if i > lo else ' '
+            after = s[i + run] if i + run < hi else ' '
+            close = -1
+            # Opening delimiters must touch text; `_` between word characters is literal
+            if not after.isspace() and not (c == '_' and before.isalnum() and after.isalnum()):
+                close = spans.closer(c, run, i + run, hi, closing=True)
+            if close == -1:
+                yield s[i:i + run]
+                i += run
+            else:
+                yield from _inline(s, i + run, close, spans)
+                i = close + run
+        else:
+            yield c
+            i += 1
+
+def _run_length(s, i, end):
+    j = i
+    while j < end and s[j] == s[i]: j += 1
+    return j - i
+
+class _Spans:
+    """Delimiter runs and bracket pairs of one line, found in one pass each and then bisected,
+    so unmatched delimiters never rescan the rest of the line."""
+
+    def __init__(self, s):
+        self.s = s
+        self._runs = {}     # (char, length, closing) -> sorted starts of matching runs
+        self._pairs = None  # index of each '[' and '(' -> index of its partner
+
+    def closer(self, c, run, start, end, closing=False):
+        """Start of the first run of exactly `run` copies of c in s[start:end], or -1.
+        With `closing`, only runs that can close emphasis count."""
+        key = (c, run, closing)
+        starts = self._runs.get(key)
+        if starts is None:
+            s = self.s
+            starts = self._runs[key] = [
+                m.start() for m in re.finditer(re.escape(c) + '+', s) if m.end() - m.start() == run
+                and (not closing or (m.start() and not s[m.start() - 1].isspace()
+                                     and not (c == '_' and m.end() < len(s) and s[m.end()].isalnum())))]
+        k = bisect.bisect_left(starts, start + 1 if closing else start)
+        return starts[k] if k < len(starts) and starts[k] + run <= end else -1
+
+    def link(self, i, end):
+        """Parses [text](url) at s[i] == '[' within s[:end]; returns (text start, text end, end index) or None."""
+        if self._pairs is None:
+            self._pairs, stacks = {}, {'[': [], '(': []}
+            for m in re.finditer(r'[][()]', self.s):
+                c = m.group()
+                if c in stacks: stacks[c].append(m.start())
+                else:
+                    stack = stacks['[' if c == ']' else '(']
+                    if stack: self._pairs[stack.pop()] = m.start()
+        j = self._pairs.get(i, end)
+        if j + 1 >= end or self.s[j + 1] != '(': return None
+        k = self._pairs.get(j + 1, end)
+        return (i + 1, j, k + 1) if k < end else None
+
+def parse_date(date_str):
+    """Parses date string into a datetime.date object."""
+    if isinstance(date_str, datetime): return date_str.date()
+    if isinstance(date_str, date): return date_str
+    if not isinstance(date_str, str): return datetime.now().date()
+
+    for fmt in ['%Y-%m-%d', '%d-%m-%Y', '%b %d, %Y', '%B %d, %Y']:
+        try: return datetime.strptime(date_str, fmt).date()
+        except: continue
+    return datetime.now().date()
+
+def load_post(filepath):
+    """Parses a post file into the metadata dict served by the blog index."""
+    with open(filepath, encoding='utf-8') as f:
+        return parse_post(f.read(), os.path.basename(filepath))
+
+def parse_post(text, filename):
+    post = frontmatter.loads(text)
+    return {
+        "title": post.get('title', 'Untitled'),
+        "date": parse_date(post.get('date')),
+        "summary": summarize(post.content),
+        "filename": filename,
+        "tags": parse_tags(post.get('tags')),
+    }
+
+def parse_tags(tags):
+    """Normalises a `tags` frontmatter value (list or comma-separated string) to a tuple."""
+    if isinstance(tags, str): tags = tags.split(',')
+    if not isinstance(tags, (list, tuple)): return ()
+    return tuple(str(tag).strip() for tag in tags if str(tag).strip())
+
+# --- INDEX ---
+class PostIndex:
+    """In-memory index of post metadata, kept sorted by date (newest first).
+
+    Each refresh is a single directory stat pass; a file is only re-parsed
+    when its mtime or size differs from the last scan and its content hash
+    differs too.
+
+    With a manifest_path, load_manifest() restores the whole index from one
+    file written by save_manifest(), so a new process serves immediately and
+    only re-parses posts that changed since (found by the next refresh).
+    """
+
+    def __init__(self, posts_dir, manifest_path=None):
+        self.posts_dir = posts_dir
+        self.manifest_path = manifest_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # filename -> ((mtime_ns, size), post dict, content hash)
+        self._manifest_dirty = False
+        self._sorted = []
+        self._lock = threading.Lock()
+        # Fingerprint and newest mtime of the listed posts, for HTTP validators
+        self.digest = ''
+        self.mtime_ns = 0
+        # Date-ordered groupings, precomputed whenever the post set changes
+        self._by_month = {}  # (year, month) -> posts
+        self._by_year = {}  # year -> posts
+        self._by_tag = {}  # lowercased tag -> posts
+        self._tag_names = {}  # lowercased tag -> display name
+        # Set while a watcher (see post_watcher.py) keeps the index current,
+        # so reads can skip the directory scan entirely.
+        self.watched = False
+        self._scanned_at = float('-inf')
+        # Callables invoked with the set of changed filenames after each update.
+        self.listeners = []
+
+    def refresh(self, notify=True):
+        """Re-parses changed files and drops deleted ones. Returns the changed filenames.
+
+        Pass notify=False when calling from a worker thread, and call notify()
+        from the event loop afterwards.
+        """
+        if not os.path.exists(self.posts_dir): os.makedirs(self.posts_dir, exist_ok=True)
+        with self._lock:
+            self._scanned_at = time.monotonic()
+            seen = set()
+            changed = set()
+            with os.scandir(self.posts_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.md') or not entry.is_file(): continue
+                    seen.add(entry.name)
+                    st = entry.stat()
+                    if self._store(entry.name, (st.st_mtime_ns, st.st_size)):
+                        changed.add(entry.name)
+            for name in set(self._entries) - seen:
+                del self._entries[name]
+                self._manifest_dirty = True
+                changed.add(name)
+            if changed:
+                self._resort()
+        if notify: self.notify(changed)
+        return changed
+
+    def update(self, filenames, notify=True):
+        """Re-checks only the given files, e.g. from filesystem events. Returns the changed filenames."""
+        with self._lock:
+            changed = set()
+            for name in filenames:
+                if not name.endswith('.md'): continue
+                try:
+                    st = os.stat(os.path.join(self.posts_dir, name))
+                except FileNotFoundError:
+                    if self._entries.pop(name, None) is not None:
+                        self._manifest_dirty = True
+                        changed.add(name)
+                    continue
+                if self._store(name, (st.st_mtime_ns, st.st_size)):
+                    changed.add(name)
+            if changed:
+                self._resort()
+        if notify: self.notify(changed)
+        return changed
+
+    def posts(self):
+        """Returns post metadata sorted by date, refreshing stale entries first."""
+        if not self.watched and time.monotonic() - self._scanned_at >= RESCAN_INTERVAL:
+            self.refresh()
+        return self._sorted
+
+    def archive(self, year, month=None):
+        """Returns the posts from a year, or from one month of it."""
+        self.posts()
+        return self._by_year.get(year, []) if month is None else self._by_month.get((year, month), [])
+
+    def tagged(self, tag):
+        """Returns the posts carrying a tag (case-insensitive)."""
+        self.posts()
+        return self._by_tag.get(tag.lower(), [])
+
+    def years(self):
+        """Returns [(year, post count)], newest first."""
+        self.posts()
+        return [(year, len(posts)) for year, posts in sorted(self._by_year.items(), reverse=True)]
+
+    def tags(self):
+        """Returns [(tag, post count)], most used first."""
+        self.posts()
+        return sorted(((self._tag_names[key], len(posts)) for key, posts in self._by_tag.items()),
+                      key=lambda item: (-item[1], item[0].lower()))
+
+    def titles(self):
+        """Returns {filename: title} for every post file as of the last refresh ('' if it failed to parse)."""
+        with self._lock:
+            return {name: str(post['title']) if post else '' for name, (_, post, _) in self._entries.items()}
+
+    def __contains__(self, filename):
+        """True if filename is a post file as of the last refresh."""
+        return filename in self._entries
+
+    def stats(self):
+        """Returns cache counters for diagnostics."""
+        return {"posts": len(self._sorted), "hits": self.hits, "misses": self.misses}
+
+    def load_manifest(self):
+        """Restores the index from the manifest in one read; returns the number of posts, or 0 without one.
+
+        Entries are trusted until the next refresh compares them with the
+        files, so a restart serves at once instead of parsing every post.
+        """
+        if not self.manifest_path: return 0
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f: manifest = json.load(f)
+            if manifest.get('version') != MANIFEST_VERSION: return 0
+            entries = {name: ((mtime_ns, size), _post_from_json(name, post), digest)
+                       for name, (mtime_ns, size, digest, post) in manifest['posts'].items()}
+        except FileNotFoundError: return 0
+        except Exception:
+            log.exception('Ignoring unreadable post manifest %s', self.manifest_path)
+            return 0
+        with self._lock:
+            self._entries = entries
+            self._manifest_dirty = False
+            self._scanned_at = time.monotonic()
+            self._resort()
+        return len(entries)
+
+    def save_manifest(self, force=False):
+        """Writes the manifest atomically if the index changed since it was loaded or saved."""
+        if not self.manifest_path or not (self._manifest_dirty or force): return False
+        with self._lock:
+            posts = {name: [stamp[0], stamp[1], digest, _post_to_json(post)]
+                     for name, (stamp, post, digest) in self._entries.items()}
+            self._manifest_dirty = False
+        data = json.dumps({"version": MANIFEST_VERSION, "posts": posts}, separators=(',', ':'), default=str)
+        directory = os.path.dirname(self.manifest_path) or '.'
+        tmp = os.path.join(directory, f'.{os.path.basename(self.manifest_path)}.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.manifest_path)
+        except BaseException:
+            self._manifest_dirty = True
+            try: os.remove(tmp)
+            except OSError: pass
+            raise
+        return True
+
+    def _store(self, name, stamp):
+        cached = self._entries.get(name)
+        if cached and cached[0] == stamp:
+            self.hits += 1
+            return False
+        self._manifest_dirty = True
+        try:
+            with open(os.path.join(self.posts_dir, name), 'rb') as f: data = f.read()
+        except OSError:
+            data = b''
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        if cached and cached[2] == digest:
+            # Touched or copied (new mtime), but the content is the same
+            self.hits += 1
+            self._entries[name] = (stamp, cached[1], digest)
+            return False
+        self.misses += 1
+        try:
+            self._entries[name] = (stamp, parse_post(data.decode('utf-8'), name), digest)
+        except:
+            # Unparseable posts are skipped, as before; remember the stamp so
+            # they are not retried until they change again.
+            self._entries[name] = (stamp, None, digest)
+        return True
+
+    def notify(self, changed):
+        """Calls the listeners with the changed filenames, if any."""
+        if not changed: return
+        for listener in list(self.listeners):
+            try: listener(changed)
+            except Exception: log.exception('Post index listener failed')
+
+    def _resort(self):
+        posts = [post for _, post, _ in self._entries.values() if post is not None]
+        self._sorted = sorted(posts, key=lambda x: x['date'], reverse=True)
+        # The listed posts' content hashes, in order: changes whenever their metadata can
+        digest = hashlib.sha256()
+        for post in self._sorted:
+            digest.update(f"{post['filename']}:{self._entries[post['filename']][2]}\n".encode('utf-8'))
+        self.digest = digest.hexdigest()
+        self.mtime_ns = max((stamp[0] for stamp, _, _ in self._entries.values()), default=0)
+
+        by_month, by_year, by_tag, tag_names = {}, {}, {}, {}
+        for post in self._sorted:
+            by_year.setdefault(post['date'].year, []).append(post)
+            by_month.setdefault((post['date'].year, post['date'].month), []).append(post)
+            for tag in post['tags']:
+                tag_names.setdefault(tag.lower(), tag)
+                by_tag.setdefault(tag.lower(), []).append(post)
+        self._by_month, self._by_year, self._by_tag, self._tag_names = by_month, by_year, by_tag, tag_names
+
+def _post_to_json(post):
+    if post is None: return None
+    return {**{key: value for key, value in post.items() if key != 'filename'}, "date": post['date'].isoformat()}
+
+def _post_from_json(filename, post):
+    if post is None: return None
+    return {**post, "date": date.fromisoformat(post['date']), "filename": filename, "tags": tuple(post['tags'])}
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PostLoader:
+    """Runs blocking post I/O on a bounded thread pool, off the event loop.
+
+    Concurrent calls with the same key share a single in-flight load
+    (single-flight), so a burst of readers on one post costs one parse.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.queued = 0  # submitted, waiting for a worker: the saturation signal
+        self.running = 0
+        self.coalesced = 0
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='post-io')
+        self._inflight = {}  # key -> asyncio.Future
+        self._lock = threading.Lock()
+
+    async def run(self, key, fn, *args):
+        """Returns fn(*args) from a worker thread, joining an identical load already in flight."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            with self._lock: self.queued += 1
+            future = asyncio.get_running_loop().run_in_executor(self._executor, self._job, fn, args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A cancelled reader (e.g. a closed tab) must not cancel the load others wait on
+        return await asyncio.shield(future)
+
+    def stats(self):
+        """Returns queue depth and worker usage for diagnostics."""
+        return {
+            "queue_depth": self.queued,
+            "running": self.running,
+            "max_workers": self.max_workers,
+            "in_flight": len(self._inflight),
+            "coalesced": self.coalesced,
+        }
+
+    def _job(self, fn, args):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock: self.running -= 1
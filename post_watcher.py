@@ -0,0 +1,48 @@
+import asyncio
+import logging
+import os
+
+try:
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+log = logging.getLogger(__name__)
+
+# Bursts of writes (e.g. repeated BlogEditor saves) inside this window are
+# applied as one update, so an edit is visible within roughly DEBOUNCE_MS.
+DEBOUNCE_MS = 300
+# Used when watchfiles is unavailable; also the worst-case delay in that mode.
+POLL_INTERVAL = 2.0
+
+async def watch_posts(index, debounce_ms=DEBOUNCE_MS, poll_interval=POLL_INTERVAL):
+    """Keeps a PostIndex current from filesystem events until cancelled.
+
+    Uses inotify (via watchfiles) where available. Set BLOG_WATCH_POLLING=1
+    to force polling, e.g. on network mounts where inotify never fires.
+    """
+    # Parsing happens on a worker thread; listeners (UI refreshes) run on the loop
+    index.notify(await asyncio.to_thread(index.refresh, False))
+    # Persist what that scan found, so the next start begins from it
+    try: await asyncio.to_thread(index.save_manifest)
+    except OSError: log.exception('Writing the post manifest failed')
+    index.watched = True
+    try:
+        if awatch is None:
+            log.info('watchfiles not installed; polling %s every %ss', index.posts_dir, poll_interval)
+            await _poll(index, poll_interval)
+        else:
+            force_polling = os.environ.get('BLOG_WATCH_POLLING') == '1' or None
+            async for changes in awatch(index.posts_dir, debounce=debounce_ms, recursive=False,
+                                        force_polling=force_polling,
+                                        watch_filter=lambda _, path: path.endswith('.md')):
+                names = {os.path.basename(path) for _, path in changes}
+                index.notify(await asyncio.to_thread(index.update, names, False))
+    finally:
+        index.watched = False
+
+async def _poll(index, interval):
+    while True:
+        await asyncio.sleep(interval)
+        try: index.notify(await asyncio.to_thread(index.refresh, False))
+        except Exception: log.exception('Polling %s failed', index.posts_dir)
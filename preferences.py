@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import unquote
+
+from nicegui import app
+
+log = logging.getLogger(__name__)
+
+# Reads of a row older than this re-save it, so active visitors never expire
+TOUCH_AFTER = 24 * 60 * 60
+
+class SQLitePreferences:
+    """Per-visitor preferences in one SQLite file, keyed by the session cookie id.
+
+    Writes are buffered and flushed in a single transaction every
+    flush_interval seconds (write-behind), so a burst of toggles costs one
+    commit. Several server processes can share the file (WAL mode); the
+    newest write wins. Rows untouched for max_age seconds are deleted.
+    """
+
+    def __init__(self, path, max_age, flush_interval=1.0):
+        self.path = path
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self._pending = {}  # (visitor, name) -> (json value, updated)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # flushes run on worker threads, the final one on the loop
+        self._read = self._connect()
+        self._write = self._connect()
+        self._write.execute('PRAGMA journal_mode=WAL')
+        self._write.execute('CREATE TABLE IF NOT EXISTS preferences ('
+                            'visitor TEXT, name TEXT, value TEXT, updated REAL, PRIMARY KEY (visitor, name))')
+        self._write.execute('CREATE INDEX IF NOT EXISTS preferences_updated ON preferences (updated)')
+        self._write.commit()
+
+    def get(self, request, name, default=None):
+        visitor = request.session.get('id')
+        if visitor is None: return default
+        with self._lock: pending = self._pending.get((visitor, name))
+        if pending: return json.loads(pending[0])
+        row = self._read.execute('SELECT value, updated FROM preferences WHERE visitor = ? AND name = ?',
+                                 (visitor, name)).fetchone()
+        if row is None: return default
+        if time.time() - row[1] > TOUCH_AFTER: self._queue(visitor, name, row[0])
+        return json.loads(row[0])
+
+    def set(self, request, name, value):
+        visitor = request.session.get('id')
+        if visitor is not None: self._queue(visitor, name, json.dumps(value))
+
+    def flush(self):
+        """Writes buffered changes in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending: return
+        with self._write_lock, self._write:
+            self._write.executemany(
+                'INSERT INTO preferences VALUES (?, ?, ?, ?) ON CONFLICT (visitor, name) '
+                'DO UPDATE SET value = excluded.value, updated = excluded.updated WHERE excluded.updated >= updated',
+                [(visitor, name, value, updated) for (visitor, name), (value, updated) in pending.items()])
+
+    def expire(self):
+        """Deletes preferences not written or read for max_age seconds; returns how many."""
+        with self._write_lock, self._write:
+            return self._write.execute('DELETE FROM preferences WHERE updated < ?',
+                                       (time.time() - self.max_age,)).rowcount
+
+    async def run(self, expire_interval=3600):
+        """Flushes every flush_interval and expires hourly until cancelled, then flushes once more."""
+        last_expiry = 0
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await asyncio.to_thread(self.flush)
+                    if time.monotonic() - last_expiry > expire_interval:
+                        last_expiry = time.monotonic()
+                        await asyncio.to_thread(self.expire)
+                except sqlite3.Error:
+                    log.exception('Writing preferences to %s failed', self.path)
+        finally:
+            self.flush()
+
+    def _queue(self, visitor, name, value):
+        with self._lock: self._pending[(visitor, name)] = (value, time.time())
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+class CookiePreferences:
+    """Preferences kept in the visitor's own cookies: no server state at all.
+
+    The server only reads them; the browser writes them (see theme.THEME_JS)
+    with a max-age of max_age seconds.
+    """
+
+    def __init__(self, max_age, prefix='pref_'):
+        self.max_age = max_age
+        self.prefix = prefix
+
+    def get(self, request, name, default=None):
+        value = request.cookies.get(self.prefix + name)
+        if value is None: return default
+        try: return json.loads(unquote(value))
+        except ValueError: return default
+
+class UserStoragePreferences:
+    """The original behaviour: NiceGUI's app.storage.user, one JSON file per visitor."""
+
+    def get(self, request, name, default=None):
+        return app.storage.user.get(name, default)
+
+    def set(self, request, name, value):
+        app.storage.user[name] = value
+
+def create_preferences(backend, path, max_age):
+    """Returns the preference store for a backend name: 'sqlite', 'cookie' or 'storage'."""
+    if backend == 'sqlite': return SQLitePreferences(path, max_age)
+    if backend == 'cookie': return CookiePreferences(max_age)
+    if backend == 'storage': return UserStoragePreferences()
+    raise ValueError(f"Unknown preference backend {backend!r} (use 'sqlite', 'cookie' or 'storage')")
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import frontmatter
+import markdown2
+from pygments.formatters import HtmlFormatter
+
+from post_index import parse_date
+
+# Same extras ui.markdown uses by default, so cached HTML matches what it would render
+MARKDOWN_EXTRAS = ('fenced-code-blocks', 'tables')
+
+# Syntax highlighting for fenced code blocks (ui.markdown normally serves this itself)
+CODEHILITE_CSS = (
+    HtmlFormatter(nobackground=True).get_style_defs('.codehilite') +
+    HtmlFormatter(nobackground=True, style='github-dark').get_style_defs('.body--dark .codehilite')
+)
+
+class RenderCache:
+    """LRU of rendered post HTML, keyed by content hash and render options.
+
+    Evicts least recently used entries once either max_entries or max_bytes
+    is exceeded. A per-file (mtime, size) memo lets repeat views skip even
+    reading the file. postprocess, if given, is applied to the HTML once
+    per render (e.g. ResponsiveImages.rewrite). dependencies, if given, maps
+    the HTML to the other files it is built from (e.g. ResponsiveImages.sources);
+    an entry is re-rendered when one of them changes.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, extras=MARKDOWN_EXTRAS,
+                 postprocess=None, dependencies=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.extras = list(extras)
+        self.postprocess = postprocess
+        self.dependencies = dependencies
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> rendered post dict
+        self._depends = {}  # key -> ((path, (mtime_ns, size) or None), ...) as rendered
+        self._files = {}  # filepath -> ((mtime_ns, size), key), only for cached keys
+        self._paths = {}  # key -> filepaths in _files, to drop them with the entry
+        self._lock = threading.Lock()
+
+    def render_post(self, filepath):
+        """Returns {'title', 'date', 'html', 'hash', 'assets_mtime_ns'} for a post file, rendering only on a miss.
+
+        'hash' covers the source and the final HTML, so it changes with the
+        images a post shows too; 'assets_mtime_ns' is the newest mtime of its
+        dependencies (0 without any).
+        """
+        stamp = _stamp(filepath)
+        with self._lock:
+            known = self._files.get(filepath)
+        if known and known[0] == stamp and self._fresh(known[1]):
+            with self._lock:
+                if known[1] in self._entries: return self._hit(known[1])
+
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        key = (digest, ' '.join(self.extras))
+        if self._fresh(key):
+            with self._lock:
+                if key in self._entries:
+                    self._remember(filepath, stamp, key)
+                    return self._hit(key)
+
+        post = frontmatter.loads(raw.decode('utf-8'))
+        html = markdown2.markdown(post.content, extras=self.extras)
+        depends = tuple((path, _stamp(path)) for path in self.dependencies(html)) if self.dependencies else ()
+        if self.postprocess:
+            html = self.postprocess(html)
+        rendered = {
+            "title": post.get('title', 'Untitled'),
+            "date": parse_date(post.get('date')),
+            "html": html,
+            "hash": hashlib.sha256(raw + b'\0' + html.encode('utf-8')).hexdigest(),
+            "assets_mtime_ns": max((stamp[0] for _, stamp in depends if stamp), default=0),
+        }
+        with self._lock:
+            self.misses += 1
+            self._remember(filepath, stamp, key)
+            self._insert(key, rendered, depends)
+        return rendered
+
+    def warm(self, filepaths):
+        """Pre-renders posts (most wanted first) until the cache is full, e.g. at server start."""
+        for filepath in filepaths:
+            if len(self._entries) >= self.max_entries or self.bytes >= self.max_bytes: break
+            try: self.render_post(filepath)
+            except: continue
+
+    def stats(self):
+        """Returns hit rate and memory use for diagnostics."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _hit(self, key):
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def _remember(self, filepath, stamp, key):
+        known = self._files.get(filepath)
+        if known and known[1] != key: self._paths.get(known[1], set()).discard(filepath)
+        self._files[filepath] = (stamp, key)
+        self._paths.setdefault(key, set()).add(filepath)
+
+    def _fresh(self, key):
+        """False once a file the entry's HTML was built from has changed."""
+        with self._lock: depends = self._depends.get(key, ())
+        return all(_stamp(path) == stamp for path, stamp in depends)
+
+    def _insert(self, key, rendered, depends):
+        stale = self._entries.pop(key, None)
+        if stale: self.bytes -= _size(stale)
+        self._entries[key] = rendered
+        self._depends[key] = depends
+        self.bytes += _size(rendered)
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.bytes -= _size(evicted)
+            del self._depends[evicted_key]
+            for filepath in self._paths.pop(evicted_key, ()): del self._files[filepath]
+
+def _stamp(path):
+    try: st = os.stat(path)
+    except FileNotFoundError: return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _size(rendered):
+    return len(rendered['html']) + len(str(rendered['title']))
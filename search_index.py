@@ -0,0 +1,249 @@
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from html import escape
+from operator import itemgetter
+
+import frontmatter
+
+from post_index import parse_date, summarize
+
+log = logging.getLogger(__name__)
+
+TOKEN = re.compile(r'\w+')
+TITLE_BOOST = 3  # a title token counts as this many body occurrences
+K1, B = 1.2, 0.75
+PREFIX_WEIGHT = 0.5  # score factor for terms that only match as a prefix
+MAX_PREFIX_TERMS = 50
+MIN_PREFIX_LENGTH = 2  # single letters would expand to most of the vocabulary
+# Per-term score tables kept between queries, counted in postings (roughly 100 bytes each)
+CACHED_POSTINGS = 250_000
+SNIPPET_CHARS = 160
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+class SearchIndex:
+    """In-memory inverted index over post titles and bodies with BM25 ranking.
+
+    Posts are (re)indexed one at a time as they change, and the per-post term
+    counts are persisted to `path` so a restart only re-tokenizes posts whose
+    mtime or size changed.
+    """
+
+    def __init__(self, posts_dir, path):
+        self.posts_dir = posts_dir
+        self.path = path
+        self._docs = {}  # filename -> {'stamp', 'title', 'date', 'text', 'counts', 'length'}
+        self._postings = {}  # term -> {filename: term frequency}
+        self._terms = []  # sorted vocabulary for prefix lookups, rebuilt lazily
+        self._terms_dirty = False
+        self._total_length = 0
+        self._norms = None  # filename -> BM25 length normalisation, rebuilt lazily
+        self._impacts = OrderedDict()  # (term, weight) -> {filename: weighted BM25 score}, LRU, cleared with _norms
+        self._impact_postings = 0
+        self._lock = threading.Lock()
+
+    # --- MAINTENANCE ---
+    def load(self):
+        """Restores the index saved by save(), if any."""
+        try:
+            with open(self.path, encoding='utf-8') as f: docs = json.load(f)
+        except FileNotFoundError: return
+        except Exception:
+            log.exception('Ignoring unreadable search index %s', self.path)
+            return
+        with self._lock:
+            for name, doc in docs.items():
+                doc['stamp'] = tuple(doc['stamp'])
+                # Replaces a doc update() may already have indexed
+                self._remove(name)
+                self._add(name, doc)
+
+    def save(self):
+        """Writes the per-post term counts atomically to disk."""
+        with self._lock:
+            data = json.dumps({name: {**doc, 'stamp': list(doc['stamp'])} for name, doc in self._docs.items()})
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(self.path + '.tmp', self.path)
+
+    def sync(self):
+        """Indexes new or changed posts and drops deleted ones. Returns the number updated."""
+        names = {name for name in os.listdir(self.posts_dir) if name.endswith('.md')}
+        return self.update(names | set(self._docs))
+
+    def update(self, filenames):
+        """Re-indexes only the given posts, e.g. from PostIndex change notifications."""
+        updated = 0
+        for name in filenames:
+            path = os.path.join(self.posts_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                with self._lock:
+                    if self._remove(name): updated += 1
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            if name in self._docs and self._docs[name]['stamp'] == stamp: continue
+            try:
+                doc = self._analyze(path, stamp)
+            except Exception:
+                log.exception('Could not index %s', name)
+                continue
+            with self._lock:
+                self._remove(name)
+                self._add(name, doc)
+            updated += 1
+        return updated
+
+    def _analyze(self, path, stamp):
+        post = frontmatter.load(path)
+        title = str(post.get('title', 'Untitled'))
+        text = summarize(post.content, limit=len(post.content))
+        counts = Counter(tokenize(text))
+        for token in tokenize(title):
+            counts[token] += TITLE_BOOST
+        return {
+            "stamp": stamp,
+            "title": title,
+            "date": parse_date(post.get('date')).isoformat(),
+            "text": text,
+            "counts": dict(counts),
+            "length": sum(counts.values()),
+        }
+
+    def _add(self, name, doc):
+        self._norms = None
+        self._docs[name] = doc
+        self._total_length += doc['length']
+        for term, tf in doc['counts'].items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms_dirty = True
+            postings[name] = tf
+
+    def _remove(self, name):
+        doc = self._docs.pop(name, None)
+        if doc is None: return False
+        self._norms = None
+        self._total_length -= doc['length']
+        for term in doc['counts']:
+            postings = self._postings[term]
+            del postings[name]
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+        return True
+
+    # --- QUERIES ---
+    def search(self, query, limit=20):
+        """Returns the best matches as dicts with filename, title, date, score and an HTML snippet."""
+        tokens = tokenize(query)
+        if not tokens: return []
+        with self._lock:
+            if self._terms_dirty:
+                self._terms = sorted(self._postings)
+                self._terms_dirty = False
+            n = len(self._docs)
+            if not n: return []
+            if self._norms is None:
+                avg_length = self._total_length / n
+                self._norms = {name: K1 * (1 - B + B * doc['length'] / avg_length) for name, doc in self._docs.items()}
+                self._impacts.clear()
+                self._impact_postings = 0
+            terms = [(term, weight) for token in tokens for term, weight in self._expand(token)]
+            if not terms: return []
+            # The longest table is copied in one step and the shorter ones are added into it
+            terms.sort(key=lambda item: -len(self._postings[item[0]]))
+            scores = None
+            matched = set()
+            for term, weight in terms:
+                matched.add(term)
+                impact = self._impact(term, weight, n)
+                if scores is None:
+                    scores = dict(impact)
+                    continue
+                get = scores.get
+                for name, score in impact.items(): scores[name] = get(name, 0) + score
+            results = []
+            # A term's matches are also matches of any shorter term it starts with, so the snippet only looks for those
+            firsts = []
+            for term in sorted(matched):
+                if not firsts or not term.startswith(firsts[-1]): firsts.append(term)
+            pattern = re.compile(r'\b(' + '|'.join(re.escape(t) for t in sorted(matched, key=len, reverse=True)) + r')\w*', re.IGNORECASE)
+            for name, score in heapq.nlargest(limit, scores.items(), key=itemgetter(1)):
+                doc = self._docs[name]
+                results.append({
+                    "filename": name,
+                    "title": doc['title'],
+                    "date": doc['date'],
+                    "score": round(score, 4),
+                    "snippet": highlight(doc['text'], pattern, firsts),
+                })
+            return results
+
+    def _impact(self, term, weight, n):
+        """Returns {filename: BM25 score times weight} for one term, cached until the index changes."""
+        impact = self._impacts.get((term, weight))
+        if impact is not None:
+            self._impacts.move_to_end((term, weight))
+            return impact
+        postings = self._postings[term]
+        boost = weight * (K1 + 1) * math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+        norms = self._norms
+        impact = self._impacts[term, weight] = {name: boost * tf / (tf + norms[name]) for name, tf in postings.items()}
+        self._impact_postings += len(impact)
+        while self._impact_postings > CACHED_POSTINGS and len(self._impacts) > 1:
+            _, evicted = self._impacts.popitem(last=False)
+            self._impact_postings -= len(evicted)
+        return impact
+
+    def _expand(self, token):
+        """Yields (term, weight) for the exact token and up to MAX_PREFIX_TERMS longer terms it prefixes."""
+        if token in self._postings: yield token, 1.0
+        if len(token) < MIN_PREFIX_LENGTH: return
+        start = bisect.bisect_right(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(token): break
+            yield term, PREFIX_WEIGHT
+
+def highlight(text, pattern, terms):
+    """Returns an escaped snippet around the first match of pattern (built from terms), with matches wrapped in <mark>."""
+    start = max(0, _first_match(text, pattern, terms) - SNIPPET_CHARS // 3)
+    if start: start = text.find(' ', start) + 1 or start
+    window = text[start:start + SNIPPET_CHARS]
+    marked = []
+    last = 0
+    for m in pattern.finditer(window):
+        marked.append(escape(window[last:m.start()]))
+        marked.append(f'<mark>{escape(m.group(0))}</mark>')
+        last = m.end()
+    marked.append(escape(window[last:]))
+    return ('...' if start else '') + ''.join(marked) + ('...' if start + SNIPPET_CHARS < len(text) else '')
+
+def _first_match(text, pattern, terms):
+    """Offset of the first match of pattern in text, or 0 without one.
+
+    Scans with str.find on the lowercased text, which is far faster than
+    the case-insensitive regex on long posts.
+    """
+    lower = text.lower()
+    if len(lower) != len(text):  # lowercasing shifted offsets (e.g. 'İ'), so let the regex scan
+        match = pattern.search(text)
+        return match.start() if match else 0
+    first = len(text)
+    for term in terms:
+        end = first + len(term)  # occurrences starting before the best so far
+        at = lower.find(term, 0, end)
+        # Only at the start of a word, like the pattern's \b
+        while at > 0 and TOKEN.match(lower, at - 1): at = lower.find(term, at + 1, end)
+        if at != -1: first = at
+    return first if first < len(text) else 0
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+from html import escape
+from urllib.parse import quote
+
+from pygments.formatters import HtmlFormatter
+
+from theme import BASE_CSS, FONT_HEAD, FONTS_DIR, ICON_HEAD, STATIC_CSS, STATIC_DARK_BOOTSTRAP, STATIC_TOGGLE_JS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+MANIFEST = '.export-manifest.json'
+
+# Dark code highlighting keyed off html.dark (ui.markdown uses Quasar's body--dark)
+STATIC_CODEHILITE_CSS = (
+    HtmlFormatter(nobackground=True).get_style_defs('.codehilite') +
+    HtmlFormatter(nobackground=True, style='github-dark').get_style_defs('html.dark .codehilite')
+)
+
+# --- TEMPLATES ---
+PAGE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+{bootstrap}
+{font}
+{icons}
+<style>{css}</style>
+</head>
+<body>
+{body}
+{toggle}
+</body>
+</html>
+'''
+
+TOGGLE = '<button class="toggle" data-theme-toggle aria-label="Toggle dark mode"><span class="material-icons">dark_mode</span></button>'
+
+def render_page(title, body, extra_css=''):
+    """Wraps body HTML in the shared document shell and theme."""
+    return PAGE.format(
+        title=escape(title),
+        bootstrap=STATIC_DARK_BOOTSTRAP,
+        font=FONT_HEAD,
+        icons=ICON_HEAD,
+        css=BASE_CSS + STATIC_CSS + extra_css,
+        body=body,
+        toggle=STATIC_TOGGLE_JS,
+    )
+
+def render_nav(site_title):
+    return f'''<nav class="nav container">
+    <a class="brand" href="/">{escape(site_title)}</a>
+    <div class="nav-links"><a href="/">Home</a><a href="/blog">Blog</a>{TOGGLE}</div>
+</nav>'''
+
+def render_home(site_title, subtitle, links):
+    """Renders the landing page."""
+    items = ''.join(
+        f'<a class="hero-link" href="{escape(link["url"])}"><span class="material-icons">{escape(link["icon"])}</span>{escape(link["name"])}</a>'
+        for link in links
+    )
+    body = f'''<div class="corner">{TOGGLE}</div>
+<main class="hero">
+    <h1 class="hero-title">{escape(site_title)}</h1>
+    <div class="hero-subtitle">{escape(subtitle)}</div>
+    <div class="hero-links">{items}</div>
+</main>'''
+    return render_page(site_title, body)
+
+def render_blog(site_title, posts, heading='Latest Writing', newer=None, older=None, years=(), tags=()):
+    """Renders a post listing page from PostIndex entries.
+
+    newer/older are URLs of the neighbouring pages; years and tags are the
+    (name, count) pairs from PostIndex.years() and PostIndex.tags().
+    """
+    items = ''.join(
+        f'''<a class="post-link" href="/post/{escape(post['filename'])}">
+    <div class="post-title">{escape(str(post['title']))}</div>
+    <div class="meta">{post['date'].strftime('%B %d, %Y')}</div>
+    <div class="summary">{escape(post['summary'])}</div>
+</a>'''
+        for post in posts
+    ) or '<p class="meta">No posts found.</p>'
+    browse = ''.join(
+        [f'<a href="/blog/{year}">{year} ({count})</a>' for year, count in years] +
+        [f'<a href="{escape(tag_url(tag))}">#{escape(tag)} ({count})</a>' for tag, count in tags]
+    )
+    pager = ''.join([
+        f'<a href="{escape(newer)}">Newer posts</a>' if newer else '<span></span>',
+        f'<a href="{escape(older)}">Older posts</a>' if older else '',
+    ])
+    body = f'''<div class="page">
+{render_nav(site_title)}
+<main class="container">
+    <div class="eyebrow">{escape(heading)}</div>
+    <div class="browse">{browse}</div>
+    {items}
+    <div class="pager">{pager}</div>
+</main>
+</div>'''
+    return render_page(f'Blog - {site_title}', body)
+
+def render_post(site_title, post):
+    """Renders a post page from a RenderCache entry."""
+    body = f'''<div class="page">
+{render_nav(site_title)}
+<main class="container">
+    <a class="back" href="/blog"><span class="material-icons">arrow_back</span>Back to Blog</a>
+    <h1 class="post-heading">{escape(str(post['title']))}</h1>
+    <div class="post-date">{post['date'].strftime('%B %d, %Y')}</div>
+    <article class="prose">{post['html']}</article>
+</main>
+</div>'''
+    return render_page(f"{post['title']} - {site_title}", body, STATIC_CODEHILITE_CSS)
+
+def render_search(site_title, query, results):
+    """Renders search results from SearchIndex.search; snippets are already escaped."""
+    items = ''.join(
+        f'''<a class="post-link" href="/post/{escape(result['filename'])}">
+    <div class="post-title">{escape(result['title'])}</div>
+    <div class="summary">{result['snippet']}</div>
+</a>'''
+        for result in results
+    ) or ('<p class="meta">No matching posts.</p>' if query.strip() else '')
+    body = f'''<div class="page">
+{render_nav(site_title)}
+<main class="container">
+    <form class="search" action="/search"><input name="q" value="{escape(query)}" placeholder="Search posts" autofocus></form>
+    {items}
+</main>
+</div>'''
+    return render_page(f'Search - {site_title}', body)
+
+# --- EXPORT ---
+TEMPLATE_SOURCES = (__file__, os.path.join(os.path.dirname(__file__), 'theme.py'))
+
+def tag_url(tag):
+    """Path of a tag's listing, with the tag percent-encoded ('/', '#', '?' and spaces included)."""
+    return '/tag/' + quote(tag, safe='')
+
+def template_fingerprint():
+    """Hash of the template sources; any change forces every page to be rebuilt."""
+    digest = hashlib.sha256()
+    for module in TEMPLATE_SOURCES:
+        with open(module, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def template_mtime_ns():
+    """Newest modification time of the template sources, for Last-Modified headers."""
+    return max(os.stat(module).st_mtime_ns for module in TEMPLATE_SOURCES)
+
+def write_compressed(path, data):
+    """Writes data plus .gz and (if brotli is installed) .br siblings for nginx's static modules."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for target, payload in [
+        (path, data),
+        (path + '.gz', gzip.compress(data, compresslevel=9, mtime=0)),
+        (path + '.br', brotli.compress(data, quality=11) if brotli else None),
+    ]:
+        if payload is None: continue
+        tmp = target + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, target)
+
+def export_site(out_dir, post_index, render_cache, images_dir, site_title, subtitle, links):
+    """Writes /, /blog and every /post/{filename} as static HTML into out_dir.
+
+    Pages whose source and templates are unchanged since the last export are
+    skipped. Returns the number of pages written and skipped.
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f: previous = json.load(f)
+    except: previous = {}
+    if brotli is None: log.warning('brotli not installed; skipping .br files')
+
+    fingerprint = template_fingerprint()
+    # Post pages carry image variant URLs derived from the originals, so any changed image re-exports them
+    images = _images_fingerprint(images_dir)
+    current = {}
+    stats = {"written": 0, "skipped": 0}
+
+    def emit(rel_path, key, render):
+        current[rel_path] = key
+        path = os.path.join(out_dir, rel_path)
+        if previous.get(rel_path) == key and os.path.exists(path):
+            stats["skipped"] += 1
+            return
+        write_compressed(path, render().encode('utf-8'))
+        stats["written"] += 1
+
+    def key_of(*parts):
+        return hashlib.sha256('\0'.join([fingerprint, *parts]).encode('utf-8')).hexdigest()
+
+    posts = post_index.posts()
+    emit('index.html', key_of(json.dumps([site_title, subtitle, links])),
+         lambda: render_home(site_title, subtitle, links))
+    emit(os.path.join('blog', 'index.html'),
+         key_of(site_title, json.dumps(posts, default=str)),
+         lambda: render_blog(site_title, posts))
+
+    for post in posts:
+        source = os.path.join(post_index.posts_dir, post['filename'])
+        with open(source, 'rb') as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+        emit(os.path.join('post', post['filename'], 'index.html'), key_of(site_title, source_hash, images),
+             lambda source=source: render_post(site_title, render_cache.render_post(source)))
+
+    # Remove pages of posts that no longer exist
+    for rel_path in set(previous) - set(current):
+        for suffix in ('', '.gz', '.br'):
+            try: os.remove(os.path.join(out_dir, rel_path + suffix))
+            except FileNotFoundError: pass
+        try: os.rmdir(os.path.dirname(os.path.join(out_dir, rel_path)))
+        except OSError: pass
+
+    _copy_files(images_dir, os.path.join(out_dir, 'post', 'images'))
+    if os.path.isdir(FONTS_DIR): _copy_files(FONTS_DIR, os.path.join(out_dir, 'fonts'))
+
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return stats
+
+def _images_fingerprint(images_dir):
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(images_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))  # not the variant cache
+        for name in sorted(files):
+            st = os.stat(os.path.join(root, name))
+            digest.update(f'{os.path.relpath(os.path.join(root, name), images_dir)}\0{st.st_mtime_ns}\0{st.st_size}\0'.encode())
+    return digest.hexdigest()
+
+def _copy_files(src_dir, dest_dir):
+    for root, _, files in os.walk(src_dir):
+        target_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src, dest = os.path.join(root, name), os.path.join(target_root, name)
+            st = os.stat(src)
+            try:
+                dst = os.stat(dest)
+                if dst.st_size == st.st_size and int(dst.st_mtime) == int(st.st_mtime): continue
+            except FileNotFoundError: pass
+            shutil.copy2(src, dest)
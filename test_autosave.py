@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import random
+
+import pytest
+
+from autosave import AutoSaver, RevisionHistory, apply_delta, atomic_write, make_delta
+
+LINES = ['# Title\n', 'Some text.\n', '\n', '```bash\n', 'ls\n', '```\n', 'no newline']
+
+def random_text(rng):
+    return ''.join(rng.choice(LINES) for _ in range(rng.randint(0, 20)))
+
+def test_delta_round_trip():
+    rng = random.Random(0)
+    for _ in range(500):
+        new, old = random_text(rng), random_text(rng)
+        assert apply_delta(new, make_delta(new, old)) == old
+
+def test_delta_of_identical_text_is_one_step():
+    text = 'a\nb\nc\n'
+    assert make_delta(text, text) == [3]
+
+def test_revisions_newest_first(tmp_path):
+    history = RevisionHistory(str(tmp_path))
+    versions = ['one\n', 'one\ntwo\n', 'zero\none\ntwo\n', 'three\n']
+    for old, new in zip(versions, versions[1:]):
+        history.record('post.md', new, old)
+    assert [text for _, text in history.revisions('post.md', versions[-1])] == versions[-2::-1]
+
+def test_revisions_are_bounded(tmp_path):
+    history = RevisionHistory(str(tmp_path), max_revisions=3)
+    for i in range(10):
+        history.record('post.md', f'v{i + 1}\n', f'v{i}\n')
+    assert [text for _, text in history.revisions('post.md', 'v10\n')] == ['v9\n', 'v8\n', 'v7\n']
+
+def test_revision_chain_cut_at_mismatch(tmp_path):
+    history = RevisionHistory(str(tmp_path))
+    history.record('post.md', 'b\n', 'a\n')
+    history.record('post.md', 'c\n', 'b\n')
+    # The file changed behind the history's back (e.g. a crash between post and history write)
+    assert history.revisions('post.md', 'edited elsewhere\n') == []
+    # A corrupt middle entry cuts the chain there instead of misapplying older deltas
+    path = tmp_path / 'post.md.jsonl'
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    entries[0]['sha'] = 'bogus'
+    path.write_text(''.join(json.dumps(entry) + '\n' for entry in entries))
+    assert [text for _, text in history.revisions('post.md', 'c\n')] == ['b\n']
+
+def test_atomic_write_replaces_and_leaves_no_temp_file(tmp_path):
+    path = tmp_path / 'post.md'
+    path.write_text('old')
+    atomic_write(str(path), 'new\r\ntext')
+    assert path.read_bytes() == b'new\r\ntext'
+    assert os.listdir(tmp_path) == ['post.md']
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / 'post.md'
+    path.write_text('old')
+    def fail(*args): raise OSError('disk full')
+    monkeypatch.setattr(os, 'replace', fail)
+    with pytest.raises(OSError):
+        atomic_write(str(path), 'new')
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['post.md']
+
+def test_pending_edits_survive_until_saved(tmp_path):
+    path = tmp_path / 'post.md'
+    path.write_text('v0\n')
+    saver = AutoSaver(str(tmp_path), idle=60)
+    saver.loaded('post.md', 'v0\n')
+    for i in range(1, 20):
+        saver.edit('post.md', f'v{i}\n')
+    assert saver.dirty('post.md') and path.read_text() == 'v0\n'
+    asyncio.run(saver.save('post.md'))
+    assert not saver.dirty('post.md') and path.read_text() == 'v19\n'
+    assert [text for _, text in saver.history.revisions('post.md', 'v19\n')] == ['v0\n']
+
+def test_failed_save_keeps_edits(tmp_path, monkeypatch):
+    path = tmp_path / 'post.md'
+    path.write_text('v0\n')
+    saver = AutoSaver(str(tmp_path), idle=60)
+    saver.loaded('post.md', 'v0\n')
+    saver.edit('post.md', 'v1\n')
+    def fail(*args): raise OSError('disk full')
+    monkeypatch.setattr(os, 'replace', fail)
+    with pytest.raises(OSError):
+        asyncio.run(saver.save('post.md'))
+    assert saver.dirty('post.md')
+    # An edit made while the failing write ran wins over the restored text
+    def edit_then_fail(*args):
+        saver.edit('post.md', 'v2\n')
+        fail()
+    monkeypatch.setattr(os, 'replace', edit_then_fail)
+    with pytest.raises(OSError):
+        asyncio.run(saver.save('post.md'))
+    monkeypatch.undo()
+    asyncio.run(saver.save('post.md'))
+    assert not saver.dirty('post.md') and path.read_text() == 'v2\n'
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from http_cache import PublicResponseCookies, _not_modified, cached_html
+
+ETAG = '"abc"'
+MODIFIED = datetime(2024, 3, 9, 12, 0, tzinfo=timezone.utc)
+
+def request(**headers):
+    return Request({'type': 'http', 'method': 'GET', 'path': '/',
+                    'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()]})
+
+def test_no_validators():
+    assert not _not_modified(request(), ETAG, MODIFIED)
+
+def test_if_none_match():
+    assert _not_modified(request(if_none_match='"abc"'), ETAG, MODIFIED)
+    assert _not_modified(request(if_none_match='"x", W/"abc"'), ETAG, MODIFIED)
+    assert _not_modified(request(if_none_match='*'), ETAG, MODIFIED)
+    assert not _not_modified(request(if_none_match='"x"'), ETAG, MODIFIED)
+
+def test_if_none_match_wins_over_if_modified_since():
+    assert not _not_modified(request(if_none_match='"x"', if_modified_since='Sat, 09 Mar 2024 12:00:00 GMT'),
+                             ETAG, MODIFIED)
+
+def test_if_modified_since():
+    assert _not_modified(request(if_modified_since='Sat, 09 Mar 2024 12:00:00 GMT'), ETAG, MODIFIED)
+    assert _not_modified(request(if_modified_since='Sun, 10 Mar 2024 00:00:00 GMT'), ETAG, MODIFIED)
+    assert not _not_modified(request(if_modified_since='Fri, 08 Mar 2024 00:00:00 GMT'), ETAG, MODIFIED)
+    assert not _not_modified(request(if_modified_since='not a date'), ETAG, MODIFIED)
+
+def test_if_modified_since_ignored_without_last_modified():
+    assert not _not_modified(request(if_modified_since='Sun, 10 Mar 2024 00:00:00 GMT'), ETAG, None)
+
+def test_cached_html_without_mtime_sends_no_last_modified():
+    response = cached_html(request(), lambda: '<p>hi</p>', ETAG, None, 'public, max-age=60')
+    assert response.status_code == 200 and 'last-modified' not in response.headers
+    assert cached_html(request(if_none_match=ETAG), lambda: '', ETAG, None, 'public').status_code == 304
+
+def test_public_responses_lose_cookies():
+    def app_with(cache_control):
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'cache-control', cache_control), (b'set-cookie', b'session=1')]})
+        return app
+
+    def headers_of(cache_control):
+        sent = []
+        async def send(message): sent.append(message)
+        asyncio.run(PublicResponseCookies(app_with(cache_control))({'type': 'http'}, None, send))
+        return dict(sent[0]['headers'])
+
+    assert b'set-cookie' not in headers_of(b'public, max-age=60')
+    assert headers_of(b'no-store')[b'set-cookie'] == b'session=1'
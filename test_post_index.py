@@ -0,0 +1,76 @@
+import json
+import os
+
+from post_index import MANIFEST_VERSION, PostIndex
+
+def write_post(directory, name, title, day, tags='home, lab'):
+    path = directory / name
+    path.write_text(f'---\ntitle: {title}\ndate: 2024-03-{day:02d}\ntags: {tags}\n---\n\nAbout {title}.\n')
+    return path
+
+def bump_mtime(path, seconds=10):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+def make_index(tmp_path):
+    posts = tmp_path / 'posts'
+    posts.mkdir()
+    for day, name in enumerate(['a.md', 'b.md', 'c.md'], 1):
+        write_post(posts, name, name[0].upper(), day)
+    return PostIndex(str(posts), str(tmp_path / 'manifest.json'))
+
+def test_manifest_round_trip(tmp_path):
+    index = make_index(tmp_path)
+    assert index.refresh() == {'a.md', 'b.md', 'c.md'}
+    assert index.save_manifest()
+    assert not index.save_manifest()  # unchanged since
+
+    restored = PostIndex(index.posts_dir, index.manifest_path)
+    assert restored.load_manifest() == 3
+    assert restored.posts() == index.posts()
+    assert [post['filename'] for post in restored.posts()] == ['c.md', 'b.md', 'a.md']
+    assert restored.tagged('LAB') == index.tagged('lab') and restored.digest == index.digest
+    # Nothing changed on disk, so the first scan parses nothing
+    assert restored.refresh() == set() and restored.misses == 0 and restored.hits == 3
+
+def test_manifest_version_mismatch_is_ignored(tmp_path):
+    index = make_index(tmp_path)
+    index.refresh()
+    index.save_manifest()
+    path = tmp_path / 'manifest.json'
+    manifest = json.loads(path.read_text())
+    manifest['version'] = MANIFEST_VERSION + 1
+    path.write_text(json.dumps(manifest))
+
+    restored = PostIndex(index.posts_dir, index.manifest_path)
+    assert restored.load_manifest() == 0 and restored.posts() == index.posts()
+    assert restored.misses == 3  # rebuilt by parsing every post
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    index = make_index(tmp_path)
+    (tmp_path / 'manifest.json').write_text('{"version": 1, "posts": ')
+    assert index.load_manifest() == 0 and len(index.posts()) == 3
+
+def test_refresh_reparses_only_changed_files(tmp_path):
+    index = make_index(tmp_path)
+    index.refresh()
+    path = write_post(tmp_path / 'posts', 'b.md', 'B2', 2)
+    bump_mtime(path)
+    (tmp_path / 'posts' / 'c.md').unlink()
+    assert index.refresh() == {'b.md', 'c.md'}
+    assert index.misses == 4 and index.hits == 1
+    assert [post['title'] for post in index.posts()] == ['B2', 'A']
+
+def test_touch_with_same_content_is_a_hit(tmp_path):
+    index = make_index(tmp_path)
+    index.refresh()
+    digest = index.digest
+    bump_mtime(tmp_path / 'posts' / 'a.md')
+    assert index.refresh() == set()
+    assert index.misses == 3 and index.hits == 3  # two unchanged stamps, one unchanged hash
+    assert index.digest == digest
+    # The new stamp is kept (and saved), so a touched post is not re-hashed on every scan
+    assert index.save_manifest()
+    restored = PostIndex(index.posts_dir, index.manifest_path)
+    restored.load_manifest()
+    assert restored.refresh() == set() and restored.misses == 0
@@ -1,32 +1,81 @@
+import random
+import time
 
-import re
-
-def strip_markdown(text):
-    # Remove headers (e.g. # Header)
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    # Remove bold/italic (e.g. **bold**, *italic*)
-    text = re.sub(r'(\*\*|__)(.*?)\1', r'\2', text)
-    text = re.sub(r'(\*|_)(.*?)\1', r'\2', text)
-    # Remove images (e.g. ![alt](url)) - remove entirely or keep alt? Keeping alt is usually better for summaries.
-    text = re.sub(r'!\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove links (e.g. [text](url))
-    text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-    # Remove code blocks (e.g. ```code```)
-    text = re.sub(r'`{3}.*?`{3}', '', text, flags=re.DOTALL)
-    # Remove inline code (e.g. `code`)
-    text = re.sub(r'`(.*?)`', r'\1', text)
-    # Remove blockquotes (e.g. > quote)
-    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
-    
-    return text.strip()
-
-content = """
-### Sick Leave...
-Here is some **bold** text and a [link](http://google.com).
-
-> A quote
-"""
-
-print(f"Original: {content!r}")
-stripped = strip_markdown(content)
-print(f"Stripped: {stripped!r}")
+from post_index import strip_markdown, summarize
+
+PARAGRAPHS = [
+    "## Setting up the server\n\nHere is some **bold** text and a [link](http://google.com).",
+    "> A quote about *home labs* and `docker compose` files.",
+    "![A photo of the rack](images/rack.jpg)\n\nThe rack sits under the stairs.",
+    "```bash\nsudo apt install nginx\nsystemctl restart nginx\n```",
+    "Plain prose with __strong words__ and an inline `code span` in the middle of it.",
+    "# Another heading\n\nMore text follows [with a link](https://example.com/page) and *emphasis*.",
+]
+
+def synthetic_post(paragraphs, seed=0):
+    rng = random.Random(seed)
+    return '\n\n'.join(rng.choice(PARAGRAPHS) for _ in range(paragraphs)) + '\n'
+
+def expected_summary(text, limit):
+    """The legacy strip_markdown output, whitespace-collapsed and cut at a word boundary."""
+    plain = ' '.join(strip_markdown(text).split())
+    if len(plain) <= limit: return plain
+    cut = plain[:limit + 1]
+    cut = cut[:cut.rindex(' ')] if ' ' in cut else cut[:limit]
+    return cut.rstrip(' ,;:-') + '...'
+
+def test_matches_strip_markdown():
+    for seed in range(50):
+        text = synthetic_post(20, seed)
+        for limit in (40, 126, 300):
+            assert summarize(text, limit) == expected_summary(text, limit)
+
+def test_matches_strip_markdown_on_large_posts():
+    text = synthetic_post(20000)
+    assert summarize(text) == expected_summary(text, 126)
+
+def test_short_text_has_no_ellipsis():
+    assert summarize("### Sick Leave...\nHere is some **bold** text.") == "Sick Leave... Here is some bold text."
+
+def test_cuts_at_word_boundary():
+    summary = summarize("word " * 100, 22)
+    assert summary == "word word word word..."
+
+def test_keeps_underscores_in_identifiers():
+    assert summarize("Set my_var_name and MAX_RETRIES, not _this_.") == "Set my_var_name and MAX_RETRIES, not this."
+
+def test_unbalanced_markup_is_kept():
+    assert summarize("A **dangling star and a [bracket") == "A **dangling star and a [bracket"
+    assert summarize("Unclosed `tick here") == "Unclosed `tick here"
+
+def test_nested_markup():
+    text = "**bold _italic_ bold** and [a *fancy* link](http://x.com/(a)) and ![alt **text**](i.png)"
+    assert summarize(text) == "bold italic bold and a fancy link and alt text"
+
+def test_unclosed_fence_hides_rest():
+    assert summarize("Intro.\n\n```\ncode\nmore code") == "Intro."
+
+def test_faster_than_strip_markdown():
+    text = synthetic_post(20000)
+
+    start = time.perf_counter()
+    legacy = strip_markdown(text)[:126]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(100):
+        summary = summarize(text)
+    summarize_time = (time.perf_counter() - start) / 100
+
+    assert legacy and summary
+    assert summarize_time * 10 < legacy_time
+
+def test_long_unbalanced_lines_are_linear():
+    # Every delimiter lacks a closer; these used to rescan the rest of the line each time
+    for pattern in ('*x ', '_a ', '[', '![x ', '**x *y '):
+        text = pattern * (60000 // len(pattern))
+        start = time.perf_counter()
+        summary = summarize(text)
+        assert time.perf_counter() - start < 1
+        assert summary.endswith('...') and len(summary) <= 126 + 3
+        assert text.startswith(summary[:-3].rstrip(' ,;:-'))
@@ -0,0 +1,70 @@
+import os
+
+from search_index import SearchIndex
+
+def write_post(directory, name, title, body):
+    path = directory / name
+    path.write_text(f'---\ntitle: {title}\ndate: 2024-03-09\n---\n\n{body}\n')
+    return path
+
+def bump_mtime(path, seconds=10):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+def make_index(tmp_path):
+    posts = tmp_path / 'posts'
+    posts.mkdir()
+    write_post(posts, 'proxy.md', 'Reverse proxy', 'Nginx in front of every service. Nginx caches, nginx compresses.')
+    write_post(posts, 'backup.md', 'Backups', 'Restic snapshots the server nightly; nginx logs are skipped.')
+    write_post(posts, 'rack.md', 'Nginx rack', 'The rack sits under the stairs.')
+    write_post(posts, 'kernel.md', 'Kernel notes', 'Building a custom kernel for the server.')
+    index = SearchIndex(str(posts), str(tmp_path / 'search.json'))
+    assert index.sync() == 4
+    return index
+
+def names(results):
+    return [result['filename'] for result in results]
+
+def test_bm25_ranks_by_frequency_and_title(tmp_path):
+    index = make_index(tmp_path)
+    results = index.search('nginx')
+    # Three body hits and a title hit beat a single body mention
+    assert names(results)[-1] == 'backup.md' and set(names(results)) == {'proxy.md', 'rack.md', 'backup.md'}
+    assert [result['score'] for result in results] == sorted((result['score'] for result in results), reverse=True)
+    # Both terms beat either one alone
+    assert names(index.search('nginx server'))[0] == 'backup.md'
+    assert index.search('unknownword') == [] and index.search('  ') == []
+
+def test_prefix_expansion(tmp_path):
+    index = make_index(tmp_path)
+    assert set(names(index.search('ngi'))) == {'proxy.md', 'rack.md', 'backup.md'}
+    assert set(names(index.search('serv'))) == {'proxy.md', 'backup.md', 'kernel.md'}
+    # Single letters don't expand; an exact match outranks a prefix match
+    assert index.search('n') == []
+    write_post(tmp_path / 'posts', 'serv.md', 'Serv', 'Serv is the name of the box.')
+    index.sync()
+    assert names(index.search('serv'))[0] == 'serv.md'
+    assert '<mark>Restic</mark>' in index.search('rest')[0]['snippet']
+
+def test_update_replaces_and_removes_single_posts(tmp_path):
+    index = make_index(tmp_path)
+    assert 'rack.md' in names(index.search('stairs')) and 'rack.md' in names(index.search('nginx'))  # now cached
+    path = write_post(tmp_path / 'posts', 'rack.md', 'Rack', 'It moved to the garage.')
+    bump_mtime(path)
+    assert index.update(['rack.md']) == 1
+    assert index.search('stairs') == [] and names(index.search('garage')) == ['rack.md']
+    assert 'rack.md' not in names(index.search('nginx'))
+
+    (tmp_path / 'posts' / 'kernel.md').unlink()
+    assert index.update(['kernel.md']) == 1
+    assert index.search('kernel') == [] and names(index.search('server')) == ['backup.md']
+    assert index.update(['kernel.md', 'proxy.md']) == 0  # already gone, and unchanged
+
+def test_load_after_save(tmp_path):
+    index = make_index(tmp_path)
+    index.save()
+    restored = SearchIndex(index.posts_dir, index.path)
+    restored.load()
+    for query in ('nginx', 'nginx server', 'ser', 'stairs'):
+        assert restored.search(query) == index.search(query)
+    assert restored.sync() == 0  # nothing re-tokenized
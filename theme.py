@@ -0,0 +1,191 @@
+# Shared look of the site, used by the NiceGUI pages (common_style) and the
+# plain HTML renderers in static_site.py.
+import hashlib
+import json
+import os
+
+# Inter is self-hosted from FONT_ROUTE so first paint never waits on a third-party
+# origin: the four weights the site uses (Latin subset, SIL OFL, see static/fonts/).
+# Only the body weight is preloaded; the others load when first used.
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'fonts')
+FONT_ROUTE = '/fonts'
+FONT_FILES = {400: 'inter-regular.woff2', 500: 'inter-medium.woff2', 600: 'inter-semibold.woff2', 700: 'inter-bold.woff2'}
+PRELOAD_WEIGHT = 400
+# Material Icons for the plain HTML pages (NiceGUI pages bring their own copy)
+ICON_FILE = 'material-icons.woff2'
+
+def font_url(name, fonts_dir=FONTS_DIR, route=FONT_ROUTE):
+    """Returns the fingerprinted URL of a font in fonts_dir, or None if it is missing."""
+    path = os.path.join(fonts_dir, name)
+    if not os.path.isfile(path): return None
+    with open(path, 'rb') as f:
+        return f'{route}/{name}?v={hashlib.sha256(f.read()).hexdigest()[:16]}'
+
+def font_head(fonts_dir=FONTS_DIR, route=FONT_ROUTE):
+    """Returns the @font-face rules for Inter, with the body weight preloaded."""
+    faces, preload = [], ''
+    for weight, name in FONT_FILES.items():
+        url = font_url(name, fonts_dir, route)
+        if url is None: continue
+        if weight == PRELOAD_WEIGHT:
+            preload = f'<link rel="preload" href="{url}" as="font" type="font/woff2" crossorigin>'
+        faces.append(f"@font-face {{ font-family: 'Inter'; font-style: normal; font-weight: {weight}; font-display: swap; "
+                     f"src: local('Inter'), url('{url}') format('woff2'); }}")
+    if not faces:
+        faces.append("@font-face { font-family: 'Inter'; font-display: swap; src: local('Inter'); }")
+    return preload + '<style>' + ' '.join(faces) + '</style>'
+
+def icon_head(fonts_dir=FONTS_DIR, route=FONT_ROUTE):
+    """Returns the Material Icons @font-face and class, as Google's stylesheet defines them."""
+    url = font_url(ICON_FILE, fonts_dir, route)
+    src = f"url('{url}') format('woff2')" if url else "local('Material Icons')"
+    return (
+        "<style>@font-face { font-family: 'Material Icons'; font-style: normal; font-weight: 400; font-display: block; "
+        f"src: {src}; }} "
+        ".material-icons { font-family: 'Material Icons'; font-weight: normal; font-style: normal; font-size: 24px; "
+        "line-height: 1; letter-spacing: normal; text-transform: none; display: inline-block; white-space: nowrap; "
+        "word-wrap: normal; direction: ltr; -webkit-font-smoothing: antialiased; font-feature-settings: 'liga'; }</style>"
+    )
+
+FONT_HEAD = font_head()
+ICON_HEAD = icon_head()
+
+BASE_CSS = '''
+    body { font-family: 'Inter', system-ui, -apple-system, 'Segoe UI', Roboto, sans-serif; background-color: white; color: #121212; transition: background-color 0.3s, color 0.3s; }
+    /* Tailwind/NiceGUI often target body, but we support html.dark too for early loading */
+    html.dark body, body.dark { background-color: #121212 !important; color: white !important; }
+
+    .nicegui-content { padding: 0 !important; max-width: 100% !important; }
+    a { text-decoration: none; color: inherit; }
+'''
+
+# --- NICEGUI PAGES ---
+# Dark mode lives entirely in the browser: localStorage (shared with the static
+# pages) decides before first paint, a toggle applies it locally, and the
+# choice reaches the server later (see theme_head).
+THEME_JS = '''
+(function (config) {
+    var KEY = "dark_mode", timer = null;
+    function cookie() {
+        var match = document.cookie.match(new RegExp("(?:^|; )" + config.cookie + "=([^;]*)"));
+        return match ? decodeURIComponent(match[1]) : null;
+    }
+    function apply(dark) {
+        document.documentElement.classList.toggle("dark", dark);
+        // NiceGUI's setDark drives Quasar (body--dark, which Tailwind's dark: keys off)
+        if (window.Quasar && typeof setDark === "function") setDark(dark);
+    }
+    function sync() {
+        timer = null;
+        var dark = localStorage.getItem(KEY) === "true";
+        if (config.url) {
+            navigator.sendBeacon(config.url, new Blob([JSON.stringify({dark_mode: dark})], {type: "application/json"}));
+        } else {
+            document.cookie = config.cookie + "=" + dark + "; path=/; max-age=" + config.maxAge + "; SameSite=Lax";
+        }
+    }
+    var stored = localStorage.getItem(KEY);
+    if (stored === null && !config.url) stored = cookie();
+    window.blogTheme = {
+        isDark: function () { return document.documentElement.classList.contains("dark"); },
+        apply: function () { apply(this.isDark()); },
+        toggle: function () {
+            var dark = !this.isDark();
+            apply(dark);
+            localStorage.setItem(KEY, dark);
+            // Repeated toggles are written once, after they settle or as the page goes away
+            if (timer) clearTimeout(timer);
+            timer = setTimeout(sync, config.delay);
+        },
+    };
+    addEventListener("pagehide", function () { if (timer) { clearTimeout(timer); sync(); } });
+    apply(stored === "true");
+    if (stored === null && config.url) {
+        // Only when the browser has forgotten (e.g. storage cleared): ask the server once
+        fetch(config.url).then(function (r) { return r.json(); }).then(function (prefs) {
+            if (typeof prefs.dark_mode !== "boolean") return;
+            localStorage.setItem(KEY, prefs.dark_mode);
+            apply(prefs.dark_mode);
+        }).catch(function () {});
+    }
+})(%s);
+'''
+
+# Runs in NiceGUI's page script right before Vue mounts, replacing its default dark setting
+THEME_MOUNT_JS = 'if (window.blogTheme) blogTheme.apply();'
+
+def theme_head(sync_url=None, cookie='pref_dark_mode', max_age=180 * 24 * 60 * 60, delay_ms=1000):
+    """Builds the one head block of every NiceGUI page: font, CSS and the dark mode bootstrap.
+
+    Toggles are synced to sync_url (GET/POST JSON) when given, otherwise to
+    a cookie the server can read. Build it once at startup.
+    """
+    config = {"url": sync_url, "cookie": cookie, "maxAge": int(max_age), "delay": delay_ms}
+    return f'{FONT_HEAD}<style>{BASE_CSS}</style><script>{THEME_JS % json.dumps(config)}</script>'
+
+# --- STATIC PAGES ---
+# The static pages use the same localStorage key and apply it before first paint.
+STATIC_DARK_BOOTSTRAP = '''
+    <script>
+        if (localStorage.getItem("dark_mode") === "true") document.documentElement.classList.add("dark");
+    </script>
+'''
+
+STATIC_TOGGLE_JS = '''
+    <script>
+        document.querySelectorAll("[data-theme-toggle]").forEach(function (btn) {
+            btn.addEventListener("click", function () {
+                var dark = document.documentElement.classList.toggle("dark");
+                localStorage.setItem("dark_mode", dark);
+            });
+        });
+    </script>
+'''
+
+# Hand-written equivalents of the Tailwind classes used by the NiceGUI pages
+STATIC_CSS = '''
+    body { margin: 0; }
+    .page { display: flex; flex-direction: column; align-items: center; min-height: 100vh; padding: 1rem 1rem 0; box-sizing: border-box; }
+    .container { width: 100%; max-width: 48rem; }
+    .nav { display: flex; justify-content: space-between; align-items: center; padding: 1rem 0; margin-bottom: 1.5rem; border-bottom: 1px solid #e5e7eb; }
+    html.dark .nav, html.dark .post-date { border-color: #222; }
+    .brand { font-size: 1.125rem; font-weight: 700; letter-spacing: -0.025em; }
+    .nav-links { display: flex; gap: 1.5rem; align-items: center; font-size: 0.875rem; color: #4b5563; }
+    html.dark .nav-links { color: rgba(255, 255, 255, 0.6); }
+    .brand:hover, .post-link:hover .post-title { color: #2563eb; }
+    html.dark .brand:hover, html.dark .post-link:hover .post-title { color: #60a5fa; }
+    .toggle { background: none; border: 0; color: inherit; cursor: pointer; padding: 0.25rem; border-radius: 9999px; }
+    .material-icons { vertical-align: middle; }
+    .eyebrow { font-size: 0.75rem; font-weight: 700; color: #9ca3af; text-transform: uppercase; letter-spacing: 0.1em; margin-bottom: 0.5rem; }
+    .post-link { display: block; margin-bottom: 1.5rem; }
+    .post-title { font-size: 1.25rem; font-weight: 700; transition: color 0.15s; }
+    .meta { font-size: 0.75rem; color: #9ca3af; font-family: ui-monospace, monospace; text-transform: uppercase; letter-spacing: 0.1em; }
+    .summary { font-size: 0.875rem; color: #4b5563; line-height: 1.625; margin-top: 0.25rem; }
+    html.dark .summary { color: rgba(255, 255, 255, 0.6); }
+    .back { display: inline-flex; align-items: center; gap: 0.5rem; margin-bottom: 1rem; font-size: 0.875rem; font-weight: 500; color: #6b7280; }
+    .post-heading { font-size: 3rem; font-weight: 900; letter-spacing: -0.025em; line-height: 1.1; margin: 0; }
+    .post-date { font-size: 0.875rem; color: #9ca3af; font-family: ui-monospace, monospace; border-bottom: 1px solid #e5e7eb; padding: 0.5rem 0; margin-bottom: 1rem; }
+    .prose { font-size: 1.125rem; line-height: 1.75; color: #374151; }
+    html.dark .prose { color: rgba(255, 255, 255, 0.8); }
+    .prose a { color: #2563eb; }
+    html.dark .prose a { color: #60a5fa; }
+    .prose img { max-width: 100%; border-radius: 0.75rem; }
+    .prose pre { overflow-x: auto; padding: 1rem; border-radius: 0.5rem; background: #f6f8fa; }
+    html.dark .prose pre { background: #1e1e1e; }
+    .hero { display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100vh; }
+    .hero-title { font-size: 6rem; font-weight: 900; letter-spacing: -0.05em; margin: 0 0 1rem; }
+    .hero-subtitle { font-size: 1.5rem; color: #6b7280; font-weight: 500; }
+    .hero-links { display: flex; gap: 1.5rem; margin-top: 3rem; }
+    .hero-link { display: flex; align-items: center; gap: 0.75rem; padding: 0.75rem 1.5rem; border-radius: 0.5rem; background: #f3f4f6; border: 1px solid #e5e7eb; font-size: 0.875rem; font-weight: 600; }
+    html.dark .hero-link { background: #1e1e1e; border-color: #333; }
+    .search input { width: 100%; box-sizing: border-box; padding: 0.75rem 1rem; margin-bottom: 1.5rem; font: inherit; color: inherit; background: transparent; border: 1px solid #e5e7eb; border-radius: 0.5rem; }
+    html.dark .search input { border-color: #333; }
+    mark { background: #fde68a; color: inherit; border-radius: 0.125rem; }
+    html.dark mark { background: #854d0e; }
+    .browse { display: flex; flex-wrap: wrap; gap: 0.25rem 1rem; margin-bottom: 1.5rem; font-size: 0.75rem; color: #6b7280; }
+    .pager { display: flex; justify-content: space-between; padding-bottom: 2rem; font-size: 0.875rem; color: #2563eb; }
+    html.dark .browse { color: rgba(255, 255, 255, 0.5); }
+    html.dark .pager { color: #60a5fa; }
+    .corner { position: absolute; top: 1rem; right: 1rem; }
+    @media (max-width: 768px) { .hero-title { font-size: 3.75rem; } .post-heading { font-size: 2.25rem; } }
+'''